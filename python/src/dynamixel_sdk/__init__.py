@@ -19,9 +19,22 @@
 
 # Author: Ryu Woon Jung (Leon)
 
+from .transport import *
 from .port_handler import *
+from .crc16 import *
 from .packet_handler import *
 from .group_sync_read import *
 from .group_sync_write import *
 from .group_bulk_read import *
 from .group_bulk_write import *
+from .group_fast_sync_read import *
+from .group_fast_bulk_read import *
+from .group_indirect_read import *
+from .read_planner import *
+from .read_scheduler import *
+from .control_loop import *
+from .bus_reader import *
+from .leader_follower import *
+from .trajectory_executor import *
+from .position_wait import *
+from .virtual_bus import *
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import threading
+
+from .robotis_def import *
+from .transport import *
+from .control_loop import *
+
+
+class BusSnapshot(object):
+    # State read by a BusReader in one cycle. The getters of the read group
+    # (getData, getAll, isAvailable, getResult, ...) answer from the copy taken
+    # at the end of the cycle; it is never changed afterwards.
+    def __init__(self, sequence, timestamp, result, group):
+        self.sequence = sequence  # cycle number, from 1
+        self.timestamp = timestamp  # port time (msec) at the end of the read
+        self.result = result  # txRxPacket result of the cycle
+        self.group = group
+
+    def __getattr__(self, name):
+        return getattr(self.group, name)
+
+
+# Background thread reading a group (GroupSyncRead, GroupBulkRead and their fast /
+# indirect variants) on a ControlLoop. Every cycle publishes a new BusSnapshot by
+# replacing one reference, so getSnapshot() costs the same whatever the bus does
+# and never waits on the port. Other threads keep using the port as usual: each
+# read takes the port lock like any other transaction.
+class BusReader(object):
+    def __init__(self, group, rate=None, spin_time=SPIN_TIME):
+        self.group = group
+        self.loop = ControlLoop(rate, read_group=group, spin_time=spin_time, clock=group.port.clock)
+
+        self.is_running = False
+        self.snapshot = None
+        self.sequence = 0
+        self.cond = threading.Condition(threading.Lock())
+        self.thread = None
+
+    def start(self):
+        if self.isRunning():
+            return False
+
+        self.is_running = True
+        self.thread = threading.Thread(target=self.run, name='BusReader')
+        self.thread.daemon = True
+        self.thread.start()
+        return True
+
+    def stop(self, timeout=None):
+        # timeout in sec; returns False if the thread is still reading
+        self.is_running = False
+        if self.thread is not None:
+            self.thread.join(timeout)
+            if self.thread.is_alive():
+                return False
+            self.thread = None
+
+        return True
+
+    def isRunning(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def run(self):
+        try:
+            self.loop.run(self.publish)
+        finally:
+            with self.cond:
+                self.cond.notify_all()
+
+    def publish(self, loop):
+        snapshot = BusSnapshot(self.sequence + 1, self.group.port.getCurrentTime(), loop.getLastResult(),
+                               self.group.getSnapshot())
+        self.snapshot = snapshot
+        self.sequence = snapshot.sequence
+
+        with self.cond:
+            self.cond.notify_all()
+
+        return self.is_running
+
+    def getSnapshot(self):
+        # latest BusSnapshot; None before the first cycle
+        return self.snapshot
+
+    def waitForSnapshot(self, sequence=0, timeout=None):
+        # waits for a snapshot newer than 'sequence' (timeout in sec); None if none came
+        deadline = None if timeout is None else default_clock() + int(timeout * 1000000000)
+
+        with self.cond:
+            while self.sequence <= sequence and self.isRunning():
+                if deadline is None:
+                    self.cond.wait()
+                    continue
+
+                remaining = deadline - default_clock()
+                if remaining <= 0:
+                    break
+                self.cond.wait(remaining / 1000000000.0)
+
+            return self.snapshot if self.sequence > sequence else None
+
+    def getStats(self):
+        # cycle statistics of the reading thread, see ControlLoop.getStats()
+        return self.loop.getStats()
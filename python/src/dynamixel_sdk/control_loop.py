@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import time
+from collections import deque
+
+from .robotis_def import *
+from .transport import *
+
+SPIN_TIME = 0.3  # msec busy-waited before each deadline; time.sleep() is not that precise
+STATS_HISTORY = 10000  # cycles kept for the percentiles
+
+CYCLE_PHASES = ('tx', 'wait', 'rx', 'user')
+
+
+# Runs a control cycle on absolute deadlines (start + n * period) of a monotonic
+# clock, so the rate does not drift with the time spent on the bus. Each cycle:
+#   tx   - read_group.txPacket()
+#   wait - until the first status bytes are in (or the packet timeout)
+#   rx   - read_group.rxPacket()
+#   user - callback(loop); returning False stops the loop
+#   tx   - write_group.txPacket(), unless the callback returned False
+# A cycle that ends after the next deadline is an overrun; the deadlines it
+# overran are skipped rather than run back to back. rate None runs the cycles
+# back to back.
+class ControlLoop(object):
+    def __init__(self, rate, read_group=None, write_group=None, spin_time=SPIN_TIME, clock=None,
+                 history_size=STATS_HISTORY):
+        self.period = int(1000000000 / rate) if rate else 0  # nsec
+        self.read_group = read_group
+        self.write_group = write_group
+        self.spin_time = int(spin_time * 1000000)  # nsec
+        self.clock = default_clock if clock is None else clock
+        self.history_size = history_size
+
+        self.is_running = False
+        self.cycle = 0
+        self.deadline = 0
+        self.last_result = COMM_NOT_AVAILABLE
+
+        self.resetStats()
+
+    def getPeriod(self):
+        # msec
+        return self.period / 1000000.0
+
+    def getCycle(self):
+        # number of the running (or next) cycle, from 0
+        return self.cycle
+
+    def getLastResult(self):
+        # result of the read of the running cycle
+        return self.last_result
+
+    def stop(self):
+        self.is_running = False
+
+    def resetStats(self):
+        self.cycle_count = 0
+        self.overrun_count = 0
+        self.skipped_count = 0
+        self.jitter = deque(maxlen=self.history_size)
+        self.phase_time = dict((phase, deque(maxlen=self.history_size)) for phase in CYCLE_PHASES)
+        self.cycle_time = deque(maxlen=self.history_size)
+
+    def getPercentiles(self, values):
+        # msec
+        if not values:
+            return {'mean': 0.0, 'p50': 0.0, 'p90': 0.0, 'p99': 0.0, 'max': 0.0}
+
+        values = sorted(values)
+        last = len(values) - 1
+        return {
+            'mean': sum(values) / 1000000.0 / len(values),
+            'p50': values[last * 50 // 100] / 1000000.0,
+            'p90': values[last * 90 // 100] / 1000000.0,
+            'p99': values[last * 99 // 100] / 1000000.0,
+            'max': values[last] / 1000000.0,
+        }
+
+    def getStats(self):
+        # jitter is the lateness of the cycle start against its deadline; times in msec
+        stats = {
+            'cycle_count': self.cycle_count,
+            'overrun_count': self.overrun_count,
+            'skipped_count': self.skipped_count,
+            'jitter': self.getPercentiles(self.jitter),
+            'cycle_time': self.getPercentiles(self.cycle_time),
+        }
+        for phase in CYCLE_PHASES:
+            stats[phase] = self.getPercentiles(self.phase_time[phase])
+
+        return stats
+
+    def sleepUntil(self, deadline):
+        # sleeps to spin_time before the deadline, then spins on the clock
+        remaining = deadline - self.clock() - self.spin_time
+        if remaining > 0:
+            time.sleep(remaining / 1000000000.0)
+
+        now = self.clock()
+        while now < deadline:
+            now = self.clock()
+
+        return now
+
+    def readData(self):
+        # (result, tx, wait, rx) times of the read phase, nsec
+        group = self.read_group
+        start = self.clock()
+
+        if not hasattr(group, 'rxPacket'):
+            # groups such as ReadPlan or ReadScheduler only have txRxPacket
+            result = group.txRxPacket()
+            return result, 0, 0, self.clock() - start
+
+        result = group.txPacket()
+        tx_end = self.clock()
+        if result != COMM_SUCCESS:
+            return result, tx_end - start, 0, 0
+
+        group.port.waitForData(max(group.port.getTimeUntilTimeout(), 0.0))
+        wait_end = self.clock()
+
+        result = group.rxPacket()
+        return result, tx_end - start, wait_end - tx_end, self.clock() - wait_end
+
+    def run(self, callback=None, cycles=None):
+        # runs until callback returns False, stop() is called or after 'cycles' cycles
+        self.is_running = True
+        self.cycle = 0
+        self.deadline = self.clock()
+
+        while self.is_running and (cycles is None or self.cycle < cycles):
+            start = self.sleepUntil(self.deadline)
+            self.jitter.append(start - self.deadline)
+
+            tx_time = wait_time = rx_time = 0
+            if self.read_group is not None:
+                self.last_result, tx_time, wait_time, rx_time = self.readData()
+
+            user_start = self.clock()
+            is_write = True
+            if callback is not None and callback(self) is False:
+                # nothing (new) to write: the packet may hold stale or placeholder data
+                self.is_running = False
+                is_write = False
+            user_end = self.clock()
+
+            if self.write_group is not None and is_write:
+                self.write_group.txPacket()
+            end = self.clock()
+
+            tx_time += end - user_end
+            self.phase_time['tx'].append(tx_time)
+            self.phase_time['wait'].append(wait_time)
+            self.phase_time['rx'].append(rx_time)
+            self.phase_time['user'].append(user_end - user_start)
+            self.cycle_time.append(end - start)
+            self.cycle_count += 1
+            self.cycle += 1
+
+            self.deadline += self.period
+            if self.period == 0:
+                self.deadline = end
+            elif end > self.deadline:
+                self.overrun_count += 1
+                skipped = (end - self.deadline) // self.period + 1
+                self.skipped_count += skipped
+                self.deadline += skipped * self.period
+
+        self.is_running = False
+        return self.cycle
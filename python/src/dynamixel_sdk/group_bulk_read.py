@@ -19,11 +19,16 @@
 
 # Author: Ryu Woon Jung (Leon)
 
+import copy
+
 from .robotis_def import *
 
 PARAM_NUM_DATA = 0
 PARAM_NUM_ADDRESS = 1
 PARAM_NUM_LENGTH = 2
+PARAM_NUM_RESULT = 3
+PARAM_NUM_ERROR = 4
+PARAM_NUM_TIMESTAMP = 5
 
 
 class GroupBulkRead:
@@ -61,7 +66,7 @@ class GroupBulkRead:
             return False
 
         data = []  # [0] * data_length
-        self.data_dict[dxl_id] = [data, start_address, data_length]
+        self.data_dict[dxl_id] = [data, start_address, data_length, COMM_RX_FAIL, 0, 0.0]
 
         self.is_param_changed = True
         return True
@@ -90,6 +95,30 @@ class GroupBulkRead:
         else:
             return self.ph.bulkReadTx(self.port, self.param, len(self.data_dict.keys()) * 5)
 
+    def getDataLengths(self):
+        data_lengths = {}
+        for dxl_id in self.data_dict:
+            data_lengths[dxl_id] = self.data_dict[dxl_id][PARAM_NUM_LENGTH]
+
+        return data_lengths
+
+    def storeData(self, rx_data, result):
+        # takes {id: [data, error, time]} from the packet handler. ids missing from
+        # rx_data keep their old data and get the failed result.
+        for dxl_id in self.data_dict:
+            param = self.data_dict[dxl_id]
+            if dxl_id not in rx_data:
+                param[PARAM_NUM_RESULT] = result if result != COMM_SUCCESS else COMM_RX_FAIL
+                continue
+
+            data, error, timestamp = rx_data[dxl_id]
+            if len(data) != param[PARAM_NUM_LENGTH]:
+                param[PARAM_NUM_RESULT] = COMM_RX_CORRUPT
+                continue
+
+            param[PARAM_NUM_DATA], param[PARAM_NUM_ERROR], param[PARAM_NUM_TIMESTAMP] = data, error, timestamp
+            param[PARAM_NUM_RESULT] = COMM_SUCCESS
+
     def rxPacket(self):
         self.last_result = False
 
@@ -98,11 +127,9 @@ class GroupBulkRead:
         if len(self.data_dict.keys()) == 0:
             return COMM_NOT_AVAILABLE
 
-        for dxl_id in self.data_dict:
-            self.data_dict[dxl_id][PARAM_NUM_DATA], result, _ = self.ph.readRx(self.port, dxl_id,
-                                                                               self.data_dict[dxl_id][PARAM_NUM_LENGTH])
-            if result != COMM_SUCCESS:
-                return result
+        # a failed id does not stop the others; see getResult()
+        rx_data, result = self.ph.bulkReadRx(self.port, self.getDataLengths())
+        self.storeData(rx_data, result)
 
         if result == COMM_SUCCESS:
             self.last_result = True
@@ -116,8 +143,41 @@ class GroupBulkRead:
 
         return self.rxPacket()
 
+    def getResult(self, dxl_id):
+        # COMM_SUCCESS if the last rxPacket got the status packet of dxl_id
+        if dxl_id not in self.data_dict:
+            return COMM_NOT_AVAILABLE
+
+        return self.data_dict[dxl_id][PARAM_NUM_RESULT]
+
+    def getError(self, dxl_id):
+        # error byte of the last status packet received from dxl_id
+        if dxl_id not in self.data_dict:
+            return 0
+
+        return self.data_dict[dxl_id][PARAM_NUM_ERROR]
+
+    def getTimestamp(self, dxl_id):
+        # port time (msec) at which the data of dxl_id was received; 0.0 if never
+        if dxl_id not in self.data_dict:
+            return 0.0
+
+        return self.data_dict[dxl_id][PARAM_NUM_TIMESTAMP]
+
+    def getSnapshot(self):
+        # copy of the received state: getData/getResult/... on it keep the values
+        # of this moment while the group goes on reading
+        snapshot = copy.copy(self)
+        snapshot.data_dict = {}
+        for dxl_id in self.data_dict:
+            param = list(self.data_dict[dxl_id])
+            param[PARAM_NUM_DATA] = tuple(param[PARAM_NUM_DATA])
+            snapshot.data_dict[dxl_id] = param
+
+        return snapshot
+
     def isAvailable(self, dxl_id, address, data_length):
-        if self.last_result is False or dxl_id not in self.data_dict:
+        if dxl_id not in self.data_dict or self.data_dict[dxl_id][PARAM_NUM_RESULT] != COMM_SUCCESS:
             return False
 
         start_addr = self.data_dict[dxl_id][PARAM_NUM_ADDRESS]
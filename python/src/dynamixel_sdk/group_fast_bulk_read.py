@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+from .robotis_def import *
+from .group_bulk_read import *
+
+
+# Bulk read through the Fast Bulk Read instruction (0x9A): every device answers
+# inside one status packet, saving the per-device packet overhead on the bus.
+class GroupFastBulkRead(GroupBulkRead):
+    def txPacket(self):
+        if self.ph.getProtocolVersion() == 1.0 or len(self.data_dict.keys()) == 0:
+            return COMM_NOT_AVAILABLE
+
+        if self.is_param_changed is True or not self.param:
+            self.makeParam()
+
+        return self.ph.fastBulkReadTx(self.port, self.param, len(self.data_dict.keys()) * 5)
+
+    def rxPacket(self):
+        self.last_result = False
+
+        if self.ph.getProtocolVersion() == 1.0 or len(self.data_dict.keys()) == 0:
+            return COMM_NOT_AVAILABLE
+
+        rx_data, result = self.ph.fastReadRx(self.port, self.getDataLengths())
+        self.storeData(rx_data, result)
+
+        if result == COMM_SUCCESS:
+            self.last_result = True
+
+        return result
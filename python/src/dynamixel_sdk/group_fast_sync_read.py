@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+from .robotis_def import *
+from .group_sync_read import *
+
+
+# Sync read through the Fast Sync Read instruction (0x8A): every device answers
+# inside one status packet, saving the per-device packet overhead on the bus.
+class GroupFastSyncRead(GroupSyncRead):
+    def txPacket(self):
+        if self.ph.getProtocolVersion() == 1.0 or len(self.slot_dict.keys()) == 0:
+            return COMM_NOT_AVAILABLE
+
+        if self.is_param_changed is True or not self.param:
+            self.makeParam()
+
+        return self.ph.fastSyncReadTx(self.port, self.start_address, self.data_length, self.param,
+                                      len(self.slot_dict.keys()) * 1)
+
+    def txPacketWithSyncWrite(self, group_sync_write, read_instruction=INST_FAST_SYNC_READ):
+        return GroupSyncRead.txPacketWithSyncWrite(self, group_sync_write, read_instruction)
+
+    def rxPacket(self):
+        self.last_result = False
+
+        if self.ph.getProtocolVersion() == 1.0:
+            return COMM_NOT_AVAILABLE
+
+        if len(self.slot_dict.keys()) == 0:
+            return COMM_NOT_AVAILABLE
+
+        rx_data, result = self.ph.fastSyncReadRx(self.port, self.data_length, self.id_list)
+        self.storeData(rx_data, result)
+
+        if result == COMM_SUCCESS:
+            self.last_result = True
+
+        return result
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+from struct import unpack_from
+
+from .robotis_def import *
+from .group_sync_read import *
+
+# Indirect Address 1 / Indirect Data 1 (JA / DYNAMIXEL P style control table)
+ADDR_INDIRECT_ADDRESS_1 = 168
+ADDR_INDIRECT_DATA_1 = 634
+INDIRECT_ENTRY_NUM = 128
+
+
+# Sync read of scattered control table fields through the indirect address table:
+# each byte of the fields is mapped to one Indirect Data byte, so the fields arrive
+# back to back in one data block. fields is a list of (name, address, length);
+# entry is the first indirect entry used (0 for Indirect Address 1).
+class GroupIndirectRead(GroupSyncRead):
+    def __init__(self, port, ph, fields, entry=0, indirect_address=ADDR_INDIRECT_ADDRESS_1,
+                 indirect_data=ADDR_INDIRECT_DATA_1, entry_num=INDIRECT_ENTRY_NUM):
+        self.fields = list(fields)
+        self.field_dict = {}  # name: (offset in the block, address, length)
+        self.entry = entry
+        self.indirect_address = indirect_address
+        self.entry_num = entry_num
+
+        offset = 0
+        for name, address, length in self.fields:
+            self.field_dict[name] = (offset, address, length)
+            offset += length
+
+        GroupSyncRead.__init__(self, port, ph, indirect_data + entry, offset)
+
+    def getFieldNames(self):
+        return [name for name, _, _ in self.fields]
+
+    def getFieldAddress(self, name):
+        # Indirect Data address where the field can be read
+        if name not in self.field_dict:
+            return -1
+
+        return self.start_address + self.field_dict[name][0]
+
+    def getIndirectAddressParam(self):
+        # the Indirect Address entries, two bytes per mapped control table byte
+        param = []
+        for _, address, length in self.fields:
+            for i in range(0, length):
+                param.append(DXL_LOBYTE(address + i))
+                param.append(DXL_HIBYTE(address + i))
+
+        return param
+
+    def writeIndirectAddress(self, dxl_id):
+        # programs the indirect address table of dxl_id; torque has to be off on
+        # models that keep the table in the EEPROM area
+        if self.ph.getProtocolVersion() == 1.0 or self.entry + self.data_length > self.entry_num:
+            return COMM_NOT_AVAILABLE, 0
+
+        param = self.getIndirectAddressParam()
+        return self.ph.writeTxRx(self.port, dxl_id, self.indirect_address + 2 * self.entry, len(param), param)
+
+    def writeIndirectAddressAll(self):
+        # writeIndirectAddress for every added id; returns the first failure
+        for dxl_id in self.id_list:
+            result, error = self.writeIndirectAddress(dxl_id)
+            if result != COMM_SUCCESS or error != 0:
+                return result, error
+
+        return COMM_SUCCESS, 0
+
+    def isFieldAvailable(self, dxl_id, name):
+        if name not in self.field_dict:
+            return False
+
+        offset, _, length = self.field_dict[name]
+        return self.isAvailable(dxl_id, self.start_address + offset, length)
+
+    def getValue(self, dxl_id, name, signed=True):
+        if not self.isFieldAvailable(dxl_id, name) or self.field_dict[name][2] not in DATA_TYPE_CODE:
+            return 0
+
+        offset, _, length = self.field_dict[name]
+        return unpack_from('<' + DATA_TYPE_CODE[length][1 if signed else 0], self.data,
+                           self.slot_dict[dxl_id] * self.data_length + offset)[0]
+
+    def getValues(self, name, signed=True):
+        # one value of the field per id, see getAll()
+        if name not in self.field_dict:
+            return None
+
+        offset, _, length = self.field_dict[name]
+        return self.getAll(self.start_address + offset, length, signed)
@@ -19,8 +19,24 @@
 
 # Author: Ryu Woon Jung (Leon)
 
+import copy
+from struct import Struct, unpack_from
+from array import array
+
 from .robotis_def import *
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# struct / array type codes per data length (unsigned, signed)
+DATA_TYPE_CODE = {1: ('B', 'b'), 2: ('H', 'h'), 4: ('I', 'i')}
+
+STATUS_NUM_RESULT = 0
+STATUS_NUM_ERROR = 1
+STATUS_NUM_TIMESTAMP = 2
+
 
 class GroupSyncRead:
     def __init__(self, port, ph, start_address, data_length):
@@ -32,7 +48,11 @@ class GroupSyncRead:
         self.last_result = False
         self.is_param_changed = False
         self.param = []
-        self.data_dict = {}
+        self.slot_dict = {}  # id: index of its data_length slot in data
+        self.id_list = []
+        self.data = bytearray()  # received data, one data_length slot per id in id_list order
+        self.status_dict = {}  # id: [result, error, timestamp] of the last rxPacket
+        self.decoders = {}
 
         self.clearParam()
 
@@ -40,22 +60,22 @@ class GroupSyncRead:
         if self.ph.getProtocolVersion() == 1.0:
             return
 
-        if not self.data_dict:  # len(self.data_dict.keys()) == 0:
+        if not self.slot_dict:  # len(self.slot_dict.keys()) == 0:
             return
 
-        self.param = []
-
-        for dxl_id in self.data_dict:
-            self.param.append(dxl_id)
+        self.param = list(self.id_list)
 
     def addParam(self, dxl_id):
         if self.ph.getProtocolVersion() == 1.0:
             return False
 
-        if dxl_id in self.data_dict:  # dxl_id already exist
+        if dxl_id in self.slot_dict:  # dxl_id already exist
             return False
 
-        self.data_dict[dxl_id] = []  # [0] * self.data_length
+        self.slot_dict[dxl_id] = len(self.id_list)
+        self.id_list.append(dxl_id)
+        self.data.extend(bytearray(self.data_length))
+        self.status_dict[dxl_id] = [COMM_RX_FAIL, 0, 0.0]
 
         self.is_param_changed = True
         return True
@@ -64,10 +84,15 @@ class GroupSyncRead:
         if self.ph.getProtocolVersion() == 1.0:
             return
 
-        if dxl_id not in self.data_dict:  # NOT exist
+        if dxl_id not in self.slot_dict:  # NOT exist
             return
 
-        del self.data_dict[dxl_id]
+        slot = self.slot_dict.pop(dxl_id)
+        del self.status_dict[dxl_id]
+        self.id_list.remove(dxl_id)
+        del self.data[slot * self.data_length: (slot + 1) * self.data_length]
+        for index in range(slot, len(self.id_list)):
+            self.slot_dict[self.id_list[index]] = index
 
         self.is_param_changed = True
 
@@ -75,17 +100,45 @@ class GroupSyncRead:
         if self.ph.getProtocolVersion() == 1.0:
             return
 
-        self.data_dict.clear()
+        self.slot_dict.clear()
+        self.status_dict.clear()
+        del self.id_list[:]
+        del self.data[:]
+
+    def getIdList(self):
+        return list(self.id_list)
 
     def txPacket(self):
-        if self.ph.getProtocolVersion() == 1.0 or len(self.data_dict.keys()) == 0:
+        if self.ph.getProtocolVersion() == 1.0 or len(self.slot_dict.keys()) == 0:
             return COMM_NOT_AVAILABLE
 
         if self.is_param_changed is True or not self.param:
             self.makeParam()
 
         return self.ph.syncReadTx(self.port, self.start_address, self.data_length, self.param,
-                                  len(self.data_dict.keys()) * 1)
+                                  len(self.slot_dict.keys()) * 1)
+
+    def storeData(self, rx_data, result):
+        # copies {id: [data, error, time]} from the packet handler into the data slots.
+        # ids missing from rx_data keep their old data and get the failed result.
+        data_length = self.data_length
+        for dxl_id in self.id_list:
+            status = self.status_dict[dxl_id]
+            if dxl_id not in rx_data:
+                status[STATUS_NUM_RESULT] = result if result != COMM_SUCCESS else COMM_RX_FAIL
+                continue
+
+            data, error, timestamp = rx_data[dxl_id]
+            if len(data) != data_length:
+                # the slots are fixed size; a short or long answer would shift the others
+                status[STATUS_NUM_RESULT] = COMM_RX_CORRUPT
+                continue
+
+            status[STATUS_NUM_RESULT] = COMM_SUCCESS
+            status[STATUS_NUM_ERROR] = error
+            status[STATUS_NUM_TIMESTAMP] = timestamp
+            offset = self.slot_dict[dxl_id] * data_length
+            self.data[offset: offset + data_length] = data
 
     def rxPacket(self):
         self.last_result = False
@@ -95,13 +148,13 @@ class GroupSyncRead:
 
         result = COMM_RX_FAIL
 
-        if len(self.data_dict.keys()) == 0:
+        if len(self.slot_dict.keys()) == 0:
             return COMM_NOT_AVAILABLE
 
-        for dxl_id in self.data_dict:
-            self.data_dict[dxl_id], result, _ = self.ph.readRx(self.port, dxl_id, self.data_length)
-            if result != COMM_SUCCESS:
-                return result
+        # all status packets are read and sorted out by id in one pass
+        # a failed id does not stop the others; see getResult()
+        rx_data, result = self.ph.syncReadRx(self.port, self.data_length, self.id_list)
+        self.storeData(rx_data, result)
 
         if result == COMM_SUCCESS:
             self.last_result = True
@@ -118,8 +171,55 @@ class GroupSyncRead:
 
         return self.rxPacket()
 
+    def txPacketWithSyncWrite(self, group_sync_write, read_instruction=INST_SYNC_READ):
+        # the sync write goes out in the same port write as the read request
+        if self.ph.getProtocolVersion() == 1.0 or len(self.slot_dict.keys()) == 0:
+            return COMM_NOT_AVAILABLE
+
+        write_packet = group_sync_write.getPacket()
+        if write_packet is None:
+            return COMM_NOT_AVAILABLE
+
+        if self.is_param_changed is True or not self.param:
+            self.makeParam()
+
+        return self.ph.syncWriteSyncReadTx(self.port, write_packet, self.start_address, self.data_length, self.param,
+                                           len(self.slot_dict.keys()) * 1, read_instruction)
+
+    def txRxPacketWithSyncWrite(self, group_sync_write):
+        if self.ph.getProtocolVersion() == 1.0:
+            return COMM_NOT_AVAILABLE
+
+        result = self.txPacketWithSyncWrite(group_sync_write)
+        if result != COMM_SUCCESS:
+            return result
+
+        return self.rxPacket()
+
+    def getResult(self, dxl_id):
+        # COMM_SUCCESS if the last rxPacket got the status packet of dxl_id
+        if dxl_id not in self.status_dict:
+            return COMM_NOT_AVAILABLE
+
+        return self.status_dict[dxl_id][STATUS_NUM_RESULT]
+
+    def getError(self, dxl_id):
+        # error byte of the last status packet received from dxl_id
+        if dxl_id not in self.status_dict:
+            return 0
+
+        return self.status_dict[dxl_id][STATUS_NUM_ERROR]
+
+    def getTimestamp(self, dxl_id):
+        # port time (msec) at which the data of dxl_id was received; 0.0 if never
+        if dxl_id not in self.status_dict:
+            return 0.0
+
+        return self.status_dict[dxl_id][STATUS_NUM_TIMESTAMP]
+
     def isAvailable(self, dxl_id, address, data_length):
-        if self.ph.getProtocolVersion() == 1.0 or self.last_result is False or dxl_id not in self.data_dict:
+        if self.ph.getProtocolVersion() == 1.0 or dxl_id not in self.slot_dict or \
+                self.status_dict[dxl_id][STATUS_NUM_RESULT] != COMM_SUCCESS:
             return False
 
         if (address < self.start_address) or (self.start_address + self.data_length - data_length < address):
@@ -128,18 +228,46 @@ class GroupSyncRead:
         return True
 
     def getData(self, dxl_id, address, data_length):
-        if not self.isAvailable(dxl_id, address, data_length):
+        if not self.isAvailable(dxl_id, address, data_length) or data_length not in DATA_TYPE_CODE:
             return 0
 
-        if data_length == 1:
-            return self.data_dict[dxl_id][address - self.start_address]
-        elif data_length == 2:
-            return DXL_MAKEWORD(self.data_dict[dxl_id][address - self.start_address],
-                                self.data_dict[dxl_id][address - self.start_address + 1])
-        elif data_length == 4:
-            return DXL_MAKEDWORD(DXL_MAKEWORD(self.data_dict[dxl_id][address - self.start_address + 0],
-                                              self.data_dict[dxl_id][address - self.start_address + 1]),
-                                 DXL_MAKEWORD(self.data_dict[dxl_id][address - self.start_address + 2],
-                                              self.data_dict[dxl_id][address - self.start_address + 3]))
-        else:
-            return 0
+        return unpack_from('<' + DATA_TYPE_CODE[data_length][0], self.data,
+                           self.slot_dict[dxl_id] * self.data_length + address - self.start_address)[0]
+
+    def getSnapshot(self):
+        # copy of the received state: getData/getAll/getResult/... on it keep the
+        # values of this moment while the group goes on reading
+        snapshot = copy.copy(self)
+        snapshot.data = bytes(self.data)
+        snapshot.slot_dict = dict(self.slot_dict)
+        snapshot.id_list = list(self.id_list)
+        snapshot.status_dict = dict((dxl_id, list(self.status_dict[dxl_id])) for dxl_id in self.status_dict)
+
+        return snapshot
+
+    def getAll(self, address, data_length, signed=True):
+        # one value per id (id_list order) decoded in a single call: a numpy array
+        # when numpy is installed, an array.array otherwise. None if unavailable.
+        if self.ph.getProtocolVersion() == 1.0 or self.last_result is False or not self.id_list:
+            return None
+
+        if (address < self.start_address) or (self.start_address + self.data_length - data_length < address) or \
+                data_length not in DATA_TYPE_CODE:
+            return None
+
+        offset = address - self.start_address
+        type_code = DATA_TYPE_CODE[data_length][1 if signed else 0]
+
+        if numpy is not None:
+            rows = numpy.frombuffer(self.data, dtype=numpy.uint8).reshape(len(self.id_list), self.data_length)
+            dtype = ('<i%d' if signed else '<u%d') % data_length
+            return rows[:, offset: offset + data_length].copy().view(dtype).ravel()
+
+        key = (offset, type_code, len(self.id_list))
+        decoder = self.decoders.get(key)
+        if decoder is None:
+            # fixed stride: skip to the field, read it, skip the rest of the slot
+            field = '%dx%s%dx' % (offset, type_code, self.data_length - offset - data_length)
+            decoder = self.decoders[key] = Struct('<' + field * len(self.id_list))
+
+        return array(type_code, decoder.unpack_from(self.data))
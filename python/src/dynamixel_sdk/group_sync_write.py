@@ -19,7 +19,13 @@
 
 # Author: Ryu Woon Jung (Leon)
 
+from struct import Struct, error as struct_error
+
 from .robotis_def import *
+from .crc16 import *
+from .group_sync_read import DATA_TYPE_CODE
+
+SYNC_WRITE_PARAM_OFFSET = 12  # HEADER0 .. INST START_ADDR_L START_ADDR_H DATA_LEN_L DATA_LEN_H (Protocol 2.0)
 
 
 class GroupSyncWrite:
@@ -32,6 +38,14 @@ class GroupSyncWrite:
         self.is_param_changed = False
         self.param = []
         self.data_dict = {}
+        self.id_list = []
+
+        # Protocol 2.0: the sync write packet is kept between cycles; setValues() packs
+        # new data straight into it and only the CRC is redone on tx
+        self.packet = None
+        self.packet_crc = 0  # CRC of the SYNC_WRITE_PARAM_OFFSET header bytes
+        self.is_data_in_packet = False  # packet holds data newer than data_dict
+        self.packers = {}
 
         self.clearParam()
 
@@ -39,15 +53,45 @@ class GroupSyncWrite:
         if not self.data_dict:
             return
 
+        self.syncData()
         self.param = []
 
-        for dxl_id in self.data_dict:
+        for dxl_id in self.id_list:
             if not self.data_dict[dxl_id]:
                 return
 
             self.param.append(dxl_id)
             self.param.extend(self.data_dict[dxl_id])
 
+    def makePacket(self):
+        self.makeParam()
+        self.packet = self.ph.makeSyncWritePacket(self.start_address, self.data_length, self.param, len(self.param))
+        if self.packet is not None:
+            self.packet_crc = updateCRC(0, self.packet, SYNC_WRITE_PARAM_OFFSET)
+
+        self.is_param_changed = False
+
+    def getPacket(self):
+        # the sync write packet for the current data; None if there is no data or on Protocol 1.0
+        if len(self.data_dict.keys()) == 0:
+            return None
+
+        if self.is_param_changed is True or self.packet is None:
+            self.makePacket()
+
+        return self.packet
+
+    def syncData(self):
+        # brings data_dict up to date with values packed by setValues()
+        if not self.is_data_in_packet:
+            return
+
+        self.is_data_in_packet = False
+        index = SYNC_WRITE_PARAM_OFFSET
+        for dxl_id in self.id_list:
+            self.data_dict[dxl_id] = list(self.packet[index + 1: index + 1 + self.data_length])
+            index += 1 + self.data_length
+
     def addParam(self, dxl_id, data):
         if dxl_id in self.data_dict:  # dxl_id already exist
             return False
@@ -55,7 +99,9 @@ class GroupSyncWrite:
         if len(data) > self.data_length:  # input data is longer than set
             return False
 
+        self.syncData()
         self.data_dict[dxl_id] = data
+        self.id_list.append(dxl_id)
 
         self.is_param_changed = True
         return True
@@ -64,7 +110,9 @@ class GroupSyncWrite:
         if dxl_id not in self.data_dict:  # NOT exist
             return
 
+        self.syncData()
         del self.data_dict[dxl_id]
+        self.id_list.remove(dxl_id)
 
         self.is_param_changed = True
 
@@ -75,6 +123,7 @@ class GroupSyncWrite:
         if len(data) > self.data_length:  # input data is longer than set
             return False
 
+        self.syncData()
         self.data_dict[dxl_id] = data
 
         self.is_param_changed = True
@@ -82,13 +131,55 @@ class GroupSyncWrite:
 
     def clearParam(self):
         self.data_dict.clear()
+        del self.id_list[:]
+        self.packet = None
+        self.is_data_in_packet = False
+
+    def setValues(self, values, signed=True):
+        # one value per id in addParam order, packed into the kept packet in one go
+        if len(values) != len(self.id_list) or self.data_length not in DATA_TYPE_CODE:
+            return False
+
+        if self.ph.getProtocolVersion() == 1.0:
+            for dxl_id, value in zip(self.id_list, values):
+                self.changeParam(dxl_id, [(int(value) >> (8 * index)) & 0xFF for index in range(0, self.data_length)])
+            return True
+
+        if self.getPacket() is None:
+            return False
+
+        packer = self.packers.get((len(self.id_list), signed))
+        if packer is None:
+            type_code = DATA_TYPE_CODE[self.data_length][1 if signed else 0]
+            packer = self.packers[(len(self.id_list), signed)] = Struct('<' + ('B' + type_code) * len(self.id_list))
+
+        # ID and value interleaved, as they sit in the packet
+        args = [0] * (2 * len(self.id_list))
+        args[0::2] = self.id_list
+        args[1::2] = values
+        try:
+            data = packer.pack(*args)
+        except struct_error:  # value out of range for the data length, or not an integer
+            return False
+
+        self.packet[SYNC_WRITE_PARAM_OFFSET: SYNC_WRITE_PARAM_OFFSET + packer.size] = data
+
+        self.is_data_in_packet = True
+        return True
 
     def txPacket(self):
         if len(self.data_dict.keys()) == 0:
             return COMM_NOT_AVAILABLE
 
-        if self.is_param_changed is True or not self.param:
-            self.makeParam()
+        if self.ph.getProtocolVersion() == 1.0:
+            if self.is_param_changed is True or not self.param:
+                self.makeParam()
+
+            return self.ph.syncWriteTxOnly(self.port, self.start_address, self.data_length, self.param,
+                                           len(self.data_dict.keys()) * (1 + self.data_length))
+
+        packet = self.getPacket()
+        if packet is None:
+            return COMM_NOT_AVAILABLE
 
-        return self.ph.syncWriteTxOnly(self.port, self.start_address, self.data_length, self.param,
-                                       len(self.data_dict.keys()) * (1 + self.data_length))
+        return self.ph.preparedSyncWriteTxOnly(self.port, packet, self.packet_crc, SYNC_WRITE_PARAM_OFFSET)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+from collections import deque
+
+from .robotis_def import *
+from .group_sync_read import *
+from .group_sync_write import *
+from .group_fast_sync_read import *
+from .control_loop import *
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+JOINT_NUM_LEADER = 0
+JOINT_NUM_FOLLOWER = 1
+JOINT_NUM_OFFSET = 2
+JOINT_NUM_SCALE = 3
+JOINT_NUM_DIRECTION = 4
+
+
+# Mirrors leader joints onto follower joints: every cycle the leader positions are
+# sync read, mapped to follower goals (offset + direction * scale * position) and
+# sync written. The write packet is reused and the mapping runs on whole arrays.
+#
+# pipelined=True sends the goals of one cycle together with the read of the next
+# one (GroupSyncRead.txRxPacketWithSyncWrite), which saves a bus round trip per
+# cycle at the cost of one cycle of latency.
+class LeaderFollower(object):
+    def __init__(self, port, ph, present_address, goal_address, data_length=4, rate=None, use_fast_read=False,
+                 pipelined=False, max_jump=None, history_size=STATS_HISTORY):
+        self.port = port
+        self.ph = ph
+        self.pipelined = pipelined
+        self.max_jump = max_jump  # leader steps larger than this are ignored (glitches)
+
+        read_class = GroupFastSyncRead if use_fast_read else GroupSyncRead
+        self.group_read = read_class(port, ph, present_address, data_length)
+        self.group_write = GroupSyncWrite(port, ph, goal_address, data_length)
+        self.loop = ControlLoop(rate, spin_time=SPIN_TIME, clock=port.clock, history_size=history_size)
+
+        self.joint_list = []  # [leader, follower, offset, scale, direction]
+        self.is_param_changed = False
+        self.leader_index = None  # read slot of the leader of each joint
+        self.gain = None
+        self.offset = None
+        self.last_goal = None
+        self.rx_time = None  # port time of the leader data in the write packet
+
+        self.latency = deque(maxlen=history_size)
+
+    def addJoint(self, leader_id, follower_id, offset=0, scale=1.0, direction=1):
+        # direction is 1 or -1; a leader can drive several followers
+        if follower_id in self.group_write.data_dict or direction not in (1, -1):
+            return False
+
+        self.group_read.addParam(leader_id)
+        self.group_write.addParam(follower_id, [0] * self.group_write.data_length)
+        self.joint_list.append([leader_id, follower_id, offset, scale, direction])
+
+        self.is_param_changed = True
+        return True
+
+    def clearJoint(self):
+        del self.joint_list[:]
+        self.group_read.clearParam()
+        self.group_write.clearParam()
+
+        self.is_param_changed = True
+
+    def makeParam(self):
+        self.leader_index = [self.group_read.slot_dict[joint[JOINT_NUM_LEADER]] for joint in self.joint_list]
+        gain = [joint[JOINT_NUM_SCALE] * joint[JOINT_NUM_DIRECTION] for joint in self.joint_list]
+        offset = [joint[JOINT_NUM_OFFSET] for joint in self.joint_list]
+
+        if numpy is not None:
+            self.leader_index = numpy.array(self.leader_index, dtype=numpy.intp)
+            self.gain = numpy.array(gain, dtype=numpy.float64)
+            self.offset = numpy.array(offset, dtype=numpy.float64)
+        else:
+            self.gain = gain
+            self.offset = offset
+
+        self.last_goal = None
+        self.rx_time = None
+        self.is_param_changed = False
+
+    def getGoal(self, positions):
+        # follower goals from the leader positions (read slot order)
+        if numpy is not None:
+            goal = numpy.rint(positions[self.leader_index] * self.gain + self.offset).astype(numpy.int64)
+            if self.max_jump is not None and self.last_goal is not None:
+                goal = numpy.where(numpy.abs(goal - self.last_goal) > self.max_jump, self.last_goal, goal)
+            return goal
+
+        goal = [int(round(positions[index] * gain + offset))
+                for index, gain, offset in zip(self.leader_index, self.gain, self.offset)]
+        if self.max_jump is not None and self.last_goal is not None:
+            goal = [last if abs(value - last) > self.max_jump else value
+                    for value, last in zip(goal, self.last_goal)]
+        return goal
+
+    def readLeader(self):
+        if self.pipelined and self.last_goal is not None:
+            result = self.group_read.txRxPacketWithSyncWrite(self.group_write)
+            self.addLatency()
+            return result
+
+        return self.group_read.txRxPacket()
+
+    def writeFollower(self):
+        result = self.group_write.txPacket()
+        if result == COMM_SUCCESS:
+            self.addLatency()
+        return result
+
+    def addLatency(self):
+        if self.rx_time is not None:
+            self.latency.append(int((self.port.getCurrentTime() - self.rx_time) * 1000000))
+            self.rx_time = None
+
+    def step(self):
+        # one read -> map -> write cycle; followers hold their goals if the read fails
+        if self.is_param_changed is True:
+            self.makeParam()
+
+        if not self.joint_list:
+            return COMM_NOT_AVAILABLE
+
+        result = self.readLeader()
+        if result != COMM_SUCCESS:
+            return result
+        rx_time = self.port.getCurrentTime()
+
+        positions = self.group_read.getAll(self.group_read.start_address, self.group_read.data_length, True)
+        goal = self.getGoal(positions)
+        if not self.group_write.setValues(goal, True):
+            return COMM_TX_ERROR
+
+        self.last_goal = goal
+        self.rx_time = rx_time
+
+        if self.pipelined:
+            return COMM_SUCCESS
+
+        return self.writeFollower()
+
+    def run(self, cycles=None):
+        # runs step() on the control loop until stop() or after 'cycles' cycles
+        return self.loop.run(self.runStep, cycles)
+
+    def runStep(self, loop):
+        self.step()
+
+    def stop(self):
+        self.loop.stop()
+
+    def getLeaderPosition(self, leader_id):
+        return self.group_read.getData(leader_id, self.group_read.start_address, self.group_read.data_length)
+
+    def getFollowerGoal(self, follower_id):
+        # last goal sent (or queued, when pipelined) to the follower
+        if self.last_goal is None or follower_id not in self.group_write.data_dict:
+            return 0
+
+        return int(self.last_goal[self.group_write.id_list.index(follower_id)])
+
+    def resetStats(self):
+        self.latency.clear()
+        self.loop.resetStats()
+
+    def getStats(self):
+        # ControlLoop statistics plus 'latency': leader data received -> follower goal sent, msec
+        stats = self.loop.getStats()
+        stats['latency'] = self.loop.getPercentiles(self.latency)
+        return stats
@@ -19,110 +19,357 @@
 
 # Author: Ryu Woon Jung (Leon)
 
+import os
 import time
 import serial
 import sys
 import platform
+import threading
+from collections import deque
+
+from .transport import *
 
 LATENCY_TIMER = 16
 DEFAULT_BAUDRATE = 1000000
+LOCK_TIMEOUT = 1000  # msec a transaction waits for the port before COMM_PORT_BUSY
+
+
+# FIFO lock guarding one bus transaction (instruction packet + status packets).
+# A thread that already holds it is refused instead of deadlocking, which keeps
+# the old COMM_PORT_BUSY behaviour for unbalanced tx/rx calls.
+class PortLock(object):
+    def __init__(self, clock=default_clock):
+        self.clock = clock
+        self.cond = threading.Condition(threading.Lock())
+        self.waiters = deque()
+        self.is_locked = False
+        self.owner = None
+
+        self.resetStats()
+
+    def resetStats(self):
+        self.acquire_count = 0
+        self.contended_count = 0
+        self.timeout_count = 0
+        self.total_wait_time = 0
+        self.max_wait_time = 0
+
+    def getStats(self):
+        # wait times in msec
+        return {
+            'acquire_count': self.acquire_count,
+            'contended_count': self.contended_count,
+            'timeout_count': self.timeout_count,
+            'total_wait_time': self.total_wait_time / 1000000.0,
+            'max_wait_time': self.max_wait_time / 1000000.0,
+            'mean_wait_time': (self.total_wait_time / 1000000.0 / self.contended_count)
+            if self.contended_count > 0 else 0.0,
+        }
+
+    def locked(self):
+        return self.is_locked
+
+    def acquire(self, timeout=None):
+        # timeout in msec; None waits forever, 0 only tries
+        me = threading.current_thread()
+
+        with self.cond:
+            if not self.is_locked and not self.waiters:
+                self.take(me, 0)
+                return True
+
+            if self.owner is me or timeout == 0:
+                self.timeout_count += 1
+                return False
+
+            waiter = object()
+            self.waiters.append(waiter)
+            start = self.clock()
+            deadline = None if timeout is None else start + int(timeout * 1000000)
+
+            while self.is_locked or self.waiters[0] is not waiter:
+                if deadline is None:
+                    self.cond.wait()
+                    continue
+
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    self.waiters.remove(waiter)
+                    self.timeout_count += 1
+                    self.cond.notify_all()
+                    return False
+                self.cond.wait(remaining / 1000000000.0)
+
+            self.waiters.popleft()
+            self.take(me, self.clock() - start)
+            return True
+
+    def take(self, owner, wait_time):
+        self.is_locked = True
+        self.owner = owner
+
+        self.acquire_count += 1
+        if wait_time > 0:
+            self.contended_count += 1
+            self.total_wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+
+    def release(self):
+        with self.cond:
+            # only the holder can release; stray releases are ignored
+            if not self.is_locked or self.owner is not threading.current_thread():
+                return
+
+            self.is_locked = False
+            self.owner = None
+            if self.waiters:
+                self.cond.notify_all()
 
 
 class PortHandler(object):
-    def __init__(self, port_name):
+    def __init__(self, port_name, clock=None, transport=None):
         self.is_open = False
         self.baudrate = DEFAULT_BAUDRATE
-        self.packet_start_time = 0.0
+        self.clock = default_clock if clock is None else clock
+        self.packet_start_time = 0
+        self.packet_deadline = 0
         self.packet_timeout = 0.0
         self.tx_time_per_byte = 0.0
+        self.latency_timer = LATENCY_TIMER
+        self.low_latency = False
 
-        self.is_using = False
+        self.lock = PortLock(self.clock)
+        self.lock_timeout = LOCK_TIMEOUT
+        self.tx_buffers = threading.local()
+        self.packet_parser = None  # rx state kept by the packet handler between reads
         self.port_name = port_name
-        self.ser = None
+        self.transport = createTransport(port_name) if transport is None else transport
+        self.transport_name = port_name if transport is None else None  # name the transport was made from
+
+        self.blocking_read = (os.name != 'nt')
+
+    @property
+    def is_using(self):
+        return self.lock.locked()
+
+    @is_using.setter
+    def is_using(self, is_using):
+        if is_using:
+            self.lock.acquire(0)
+        else:
+            self.lock.release()
+
+    @property
+    def ser(self):
+        return getattr(self.transport, 'ser', None)
 
     def openPort(self):
         return self.setBaudRate(self.baudrate)
 
     def closePort(self):
-        self.ser.close()
+        self.transport.close()
         self.is_open = False
 
     def clearPort(self):
-        self.ser.flush()
+        self.transport.flush()
 
     def setPortName(self, port_name):
+        # as before, the new name is used when the port is (re)opened; a transport
+        # given by the caller is kept, see setTransport()
         self.port_name = port_name
 
     def getPortName(self):
         return self.port_name
 
+    def acquirePort(self):
+        return self.lock.acquire(self.lock_timeout)
+
+    def releasePort(self):
+        self.lock.release()
+
+    def setLockTimeout(self, msec):
+        # None waits for the port as long as it takes
+        self.lock_timeout = msec
+
+    def getLockTimeout(self):
+        return self.lock_timeout
+
+    def getLockStats(self):
+        return self.lock.getStats()
+
+    def getTxBuffer(self, instruction, length):
+        # packet buffers are reused per thread and per instruction to keep the
+        # control loop free of allocations
+        buffers = getattr(self.tx_buffers, 'buffers', None)
+        if buffers is None:
+            buffers = self.tx_buffers.buffers = {}
+
+        txpacket = buffers.get(instruction)
+        if txpacket is None:
+            txpacket = buffers[instruction] = bytearray(length)
+        elif len(txpacket) > length:
+            del txpacket[length:]
+        elif len(txpacket) < length:
+            txpacket.extend(bytearray(length - len(txpacket)))
+
+        return txpacket
+
+    def setTransport(self, transport):
+        self.transport = transport
+        self.transport_name = None
+
+    def getTransport(self):
+        return self.transport
+
     def setBaudRate(self, baudrate):
         baud = self.getCFlagBaud(baudrate)
 
         if baud <= 0:
-            # self.setupPort(38400)
-            # self.baudrate = baudrate
-            return False  # TODO: setCustomBaudrate(baudrate)
+            return self.setCustomBaudrate(baudrate)
         else:
             self.baudrate = baudrate
             return self.setupPort(baud)
 
+    def setCustomBaudrate(self, baudrate):
+        # pyserial programs rates outside the termios table through termios2/BOTHER on linux
+        if baudrate <= 0:
+            return False
+
+        prev_baudrate = self.baudrate
+        self.baudrate = baudrate
+        try:
+            return self.setupPort(baudrate)
+        except (ValueError, serial.SerialException):
+            self.baudrate = prev_baudrate
+            if not self.is_open:
+                try:
+                    self.setupPort(self.getCFlagBaud(prev_baudrate))
+                except (ValueError, serial.SerialException):
+                    pass
+            return False
+
     def getBaudRate(self):
         return self.baudrate
 
+    def getLatencyTimer(self):
+        return self.latency_timer
+
+    def readLatencyTimer(self):
+        return self.transport.getLatencyTimer()
+
+    def updateLatencyTimer(self):
+        latency_timer = self.readLatencyTimer()
+        self.latency_timer = LATENCY_TIMER if latency_timer < 0 else latency_timer
+        return self.latency_timer
+
+    def setLatencyTimer(self, msec):
+        if not self.transport.setLatencyTimer(msec):
+            return False
+
+        self.updateLatencyTimer()
+        return True
+
+    def setLowLatency(self, enable):
+        self.low_latency = enable
+
+        if not self.is_open:
+            return True
+
+        return self.applyLowLatency()
+
+    def applyLowLatency(self):
+        if not self.transport.setLowLatency(self.low_latency):
+            return False
+
+        # the FTDI driver drops its latency timer to 1 msec in low latency mode
+        self.updateLatencyTimer()
+        return True
+
     def getBytesAvailable(self):
-        return self.ser.in_waiting
+        return self.transport.inWaiting()
+
+    def setBlockingRead(self, enable):
+        self.blocking_read = enable
+
+    def getBlockingRead(self):
+        return self.blocking_read
 
     def readPort(self, length):
+        if self.blocking_read:
+            data = self.readPortUntilTimeout(length)
+        else:
+            data = self.transport.read(length)
+
         if (sys.version_info > (3, 0)):
-            return self.ser.read(length)
+            return data
         else:
-            return [ord(ch) for ch in self.ser.read(length)]
+            return [ord(ch) for ch in data]
+
+    def readPortUntilTimeout(self, length):
+        # sleep on the port until 'length' bytes are in or the packet deadline passes
+        data = self.transport.read(length)
+        while len(data) < length:
+            remaining = self.getTimeUntilTimeout()
+            if remaining <= 0.0 or not self.transport.waitForData(remaining):
+                break
+            data += self.transport.read(length - len(data))
+
+        return data
+
+    def waitForData(self, msec):
+        return self.transport.waitForData(msec)
 
     def writePort(self, packet):
-        return self.ser.write(packet)
+        return self.transport.write(packet)
+
+    def setClock(self, clock):
+        self.clock = clock
+        self.lock.clock = clock
 
     def setPacketTimeout(self, packet_length):
-        self.packet_start_time = self.getCurrentTime()
-        self.packet_timeout = (self.tx_time_per_byte * packet_length) + (LATENCY_TIMER * 2.0) + 2.0
+        self.setPacketTimeoutMillis((self.tx_time_per_byte * packet_length) + (self.latency_timer * 2.0) + 2.0)
 
     def setPacketTimeoutMillis(self, msec):
-        self.packet_start_time = self.getCurrentTime()
+        self.packet_start_time = self.clock()
         self.packet_timeout = msec
+        self.packet_deadline = self.packet_start_time + int(msec * 1000000)
 
     def isPacketTimeout(self):
-        if self.getTimeSinceStart() > self.packet_timeout:
+        if self.clock() > self.packet_deadline:
             self.packet_timeout = 0
+            self.packet_deadline = self.packet_start_time
             return True
 
         return False
 
+    # msec on the port clock (monotonic by default), not msec since the epoch; only differences between
+    # two readings are meaningful
     def getCurrentTime(self):
-        return round(time.time() * 1000000000) / 1000000.0
+        return self.clock() / 1000000.0
 
     def getTimeSinceStart(self):
-        time_since = self.getCurrentTime() - self.packet_start_time
-        if time_since < 0.0:
-            self.packet_start_time = self.getCurrentTime()
+        return (self.clock() - self.packet_start_time) / 1000000.0
 
-        return time_since
+    def getTimeUntilTimeout(self):
+        return (self.packet_deadline - self.clock()) / 1000000.0
 
     def setupPort(self, cflag_baud):
-        if self.is_open:
-            self.closePort()
-
-        self.ser = serial.Serial(
-            port=self.port_name,
-            baudrate=self.baudrate,
-            # parity = serial.PARITY_ODD,
-            # stopbits = serial.STOPBITS_TWO,
-            bytesize=serial.EIGHTBITS,
-            timeout=0
-        )
+        # the transport reopens or reconfigures itself for the new baudrate
+        self.is_open = False
+
+        if self.transport_name is not None and self.transport_name != self.port_name:
+            # setPortName() since the transport was made: the old port is closed for good
+            self.transport.close()
+            self.transport = createTransport(self.port_name)
+            self.transport_name = self.port_name
+
+        self.transport.open(self.baudrate)
 
         self.is_open = True
 
-        self.ser.reset_input_buffer()
+        self.updateLatencyTimer()
+        if self.low_latency:
+            self.applyLowLatency()
 
         self.tx_time_per_byte = (1000.0 / self.baudrate) * 10.0
 
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+from struct import pack, unpack
+
+from .robotis_def import *
+from .group_sync_read import *
+from .group_fast_sync_read import *
+from .control_loop import *
+
+WAIT_RATE = 50  # Hz, sync reads per second while waiting
+
+
+# Waits until every actuator of dxl_ids is within tolerance of its goal (goals: one
+# value per id, or one value for all), polling all of them with a single sync read
+# per cycle at 'rate'. With moving_address the Moving byte must also be 0; it is
+# read in the same packet as the present position. An actuator that has settled is
+# dropped from the read. timeout in sec, None waits for ever.
+#
+# Returns (present positions in dxl_ids order, ids that did not settle in time,
+# result of the last read).
+def waitUntilReached(port, ph, dxl_ids, goals, tolerance, timeout, present_address, data_length=4,
+                     moving_address=None, rate=WAIT_RATE, use_fast_read=False):
+    dxl_ids = list(dxl_ids)
+    present = [0] * len(dxl_ids)
+    if not hasattr(goals, '__len__'):
+        goals = [goals] * len(dxl_ids)
+
+    if ph.getProtocolVersion() == 1.0 or len(goals) != len(dxl_ids) or data_length not in DATA_TYPE_CODE:
+        return present, dxl_ids, COMM_NOT_AVAILABLE
+
+    start_address = present_address
+    end_address = present_address + data_length
+    if moving_address is not None:
+        start_address = min(start_address, moving_address)
+        end_address = max(end_address, moving_address + 1)
+
+    read_class = GroupFastSyncRead if use_fast_read else GroupSyncRead
+    group = read_class(port, ph, start_address, end_address - start_address)
+    for dxl_id in dxl_ids:
+        if not group.addParam(dxl_id):  # duplicate id
+            return present, dxl_ids, COMM_NOT_AVAILABLE
+
+    unsigned_code, signed_code = DATA_TYPE_CODE[data_length]
+    pending = set(dxl_ids)
+    loop = ControlLoop(rate, read_group=group, clock=port.clock)
+    deadline = None if timeout is None else loop.clock() + int(timeout * 1000000000)
+
+    def checkReached(loop):
+        for index, dxl_id in enumerate(dxl_ids):
+            if dxl_id not in pending or not group.isAvailable(dxl_id, present_address, data_length):
+                continue
+
+            value = group.getData(dxl_id, present_address, data_length)
+            present[index] = unpack('<' + signed_code, pack('<' + unsigned_code, value))[0]
+            if abs(goals[index] - present[index]) > tolerance:
+                continue
+            if moving_address is not None and group.getData(dxl_id, moving_address, 1) != 0:
+                continue
+
+            pending.discard(dxl_id)
+            group.removeParam(dxl_id)
+
+        return bool(pending) and (deadline is None or loop.clock() < deadline)
+
+    loop.run(checkReached)
+
+    return present, [dxl_id for dxl_id in dxl_ids if dxl_id in pending], loop.getLastResult()
@@ -97,13 +97,12 @@ class Protocol1PacketHandler(object):
         checksum = 0
         total_packet_length = txpacket[PKT_LENGTH] + 4  # 4: HEADER0 HEADER1 ID LENGTH
 
-        if port.is_using:
+        if not port.acquirePort():
             return COMM_PORT_BUSY
-        port.is_using = True
 
         # check max packet length
         if total_packet_length > TXPACKET_MAX_LEN:
-            port.is_using = False
+            port.releasePort()
             return COMM_TX_ERROR
 
         # make packet header
@@ -119,10 +118,15 @@ class Protocol1PacketHandler(object):
         #print "[TxPacket] %r" % txpacket
 
         # tx packet
-        port.clearPort()
-        written_packet_length = port.writePort(txpacket)
+        try:
+            port.clearPort()
+            written_packet_length = port.writePort(txpacket)
+        except BaseException:
+            # a transport error must not leave the port locked
+            port.releasePort()
+            raise
         if total_packet_length != written_packet_length:
-            port.is_using = False
+            port.releasePort()
             return COMM_TX_FAIL
 
         return COMM_SUCCESS
@@ -135,67 +139,68 @@ class Protocol1PacketHandler(object):
         rx_length = 0
         wait_length = 6  # minimum length (HEADER0 HEADER1 ID LENGTH ERROR CHKSUM)
 
-        while True:
-            rxpacket.extend(port.readPort(wait_length - rx_length))
-            rx_length = len(rxpacket)
-            if rx_length >= wait_length:
-                # find packet header
-                for idx in range(0, (rx_length - 1)):
-                    if (rxpacket[idx] == 0xFF) and (rxpacket[idx + 1] == 0xFF):
-                        break
-
-                if idx == 0:  # found at the beginning of the packet
-                    if (rxpacket[PKT_ID] > 0xFD) or (rxpacket[PKT_LENGTH] > RXPACKET_MAX_LEN) or (
-                            rxpacket[PKT_ERROR] > 0x7F):
-                        # unavailable ID or unavailable Length or unavailable Error
-                        # remove the first byte in the packet
-                        del rxpacket[0]
-                        rx_length -= 1
-                        continue
-
-                    # re-calculate the exact length of the rx packet
-                    if wait_length != (rxpacket[PKT_LENGTH] + PKT_LENGTH + 1):
-                        wait_length = rxpacket[PKT_LENGTH] + PKT_LENGTH + 1
-                        continue
-
-                    if rx_length < wait_length:
-                        # check timeout
-                        if port.isPacketTimeout():
-                            if rx_length == 0:
-                                result = COMM_RX_TIMEOUT
-                            else:
-                                result = COMM_RX_CORRUPT
+        try:
+            while True:
+                rxpacket.extend(port.readPort(wait_length - rx_length))
+                rx_length = len(rxpacket)
+                if rx_length >= wait_length:
+                    # find packet header
+                    for idx in range(0, (rx_length - 1)):
+                        if (rxpacket[idx] == 0xFF) and (rxpacket[idx + 1] == 0xFF):
                             break
-                        else:
+
+                    if idx == 0:  # found at the beginning of the packet
+                        if (rxpacket[PKT_ID] > 0xFD) or (rxpacket[PKT_LENGTH] > RXPACKET_MAX_LEN) or (
+                                rxpacket[PKT_ERROR] > 0x7F):
+                            # unavailable ID or unavailable Length or unavailable Error
+                            # remove the first byte in the packet
+                            del rxpacket[0]
+                            rx_length -= 1
                             continue
 
-                    # calculate checksum
-                    for i in range(2, wait_length - 1):  # except header, checksum
-                        checksum += rxpacket[i]
-                    checksum = ~checksum & 0xFF
+                        # re-calculate the exact length of the rx packet
+                        if wait_length != (rxpacket[PKT_LENGTH] + PKT_LENGTH + 1):
+                            wait_length = rxpacket[PKT_LENGTH] + PKT_LENGTH + 1
+                            continue
 
-                    # verify checksum
-                    if rxpacket[wait_length - 1] == checksum:
-                        result = COMM_SUCCESS
-                    else:
-                        result = COMM_RX_CORRUPT
-                    break
+                        if rx_length < wait_length:
+                            # check timeout
+                            if port.isPacketTimeout():
+                                if rx_length == 0:
+                                    result = COMM_RX_TIMEOUT
+                                else:
+                                    result = COMM_RX_CORRUPT
+                                break
+                            else:
+                                continue
+
+                        # calculate checksum
+                        for i in range(2, wait_length - 1):  # except header, checksum
+                            checksum += rxpacket[i]
+                        checksum = ~checksum & 0xFF
+
+                        # verify checksum
+                        if rxpacket[wait_length - 1] == checksum:
+                            result = COMM_SUCCESS
+                        else:
+                            result = COMM_RX_CORRUPT
+                        break
 
-                else:
-                    # remove unnecessary packets
-                    del rxpacket[0: idx]
-                    rx_length -= idx
-
-            else:
-                # check timeout
-                if port.isPacketTimeout():
-                    if rx_length == 0:
-                        result = COMM_RX_TIMEOUT
                     else:
-                        result = COMM_RX_CORRUPT
-                    break
+                        # remove unnecessary packets
+                        del rxpacket[0: idx]
+                        rx_length -= idx
 
-        port.is_using = False
+                else:
+                    # check timeout
+                    if port.isPacketTimeout():
+                        if rx_length == 0:
+                            result = COMM_RX_TIMEOUT
+                        else:
+                            result = COMM_RX_CORRUPT
+                        break
+        finally:
+            port.releasePort()
 
         #print "[RxPacket] %r" % rxpacket
 
@@ -217,7 +222,7 @@ class Protocol1PacketHandler(object):
 
         # (ID == Broadcast ID) == no need to wait for status packet or not available
         if (txpacket[PKT_ID] == BROADCAST_ID):
-            port.is_using = False
+            port.releasePort()
             return rxpacket, result, error
 
         # set packet timeout
@@ -402,7 +407,8 @@ class Protocol1PacketHandler(object):
         txpacket[PKT_PARAMETER0 + 1: PKT_PARAMETER0 + 1 + length] = data[0: length]
 
         result = self.txPacket(port, txpacket)
-        port.is_using = False
+        if result == COMM_SUCCESS:
+            port.releasePort()
 
         return result
 
@@ -460,7 +466,8 @@ class Protocol1PacketHandler(object):
         txpacket[PKT_PARAMETER0 + 1: PKT_PARAMETER0 + 1 + length] = data[0: length]
 
         result = self.txPacket(port, txpacket)
-        port.is_using = False
+        if result == COMM_SUCCESS:
+            port.releasePort()
 
         return result
 
@@ -481,6 +488,18 @@ class Protocol1PacketHandler(object):
     def syncReadTx(self, port, start_address, data_length, param, param_length):
         return COMM_NOT_AVAILABLE
 
+    def syncReadRx(self, port, data_length, dxl_id_list):
+        return {}, COMM_NOT_AVAILABLE
+
+    def fastSyncReadTx(self, port, start_address, data_length, param, param_length):
+        return COMM_NOT_AVAILABLE
+
+    def fastSyncReadRx(self, port, data_length, dxl_id_list):
+        return {}, COMM_NOT_AVAILABLE
+
+    def fastReadRx(self, port, data_lengths):
+        return {}, COMM_NOT_AVAILABLE
+
     def syncWriteTxOnly(self, port, start_address, data_length, param, param_length):
         txpacket = [0] * (param_length + 8)
         # 8: HEADER0 HEADER1 ID LEN INST START_ADDR DATA_LEN ... CHKSUM
@@ -497,6 +516,16 @@ class Protocol1PacketHandler(object):
 
         return result
 
+    def makeSyncWritePacket(self, start_address, data_length, param, param_length):
+        return None
+
+    def preparedSyncWriteTxOnly(self, port, txpacket, crc_accum=0, crc_length=0):
+        return COMM_NOT_AVAILABLE
+
+    def syncWriteSyncReadTx(self, port, write_packet, read_start_address, read_data_length, read_param,
+                            read_param_length, read_instruction=INST_SYNC_READ):
+        return COMM_NOT_AVAILABLE
+
     def bulkReadTx(self, port, param, param_length):
         txpacket = [0] * (param_length + 7)
         # 7: HEADER0 HEADER1 ID LEN INST 0x00 ... CHKSUM
@@ -519,5 +548,22 @@ class Protocol1PacketHandler(object):
 
         return result
 
+    def bulkReadRx(self, port, data_lengths):
+        # status packets come back in request order; a failed id does not stop the others
+        data_dict = {}
+        result = COMM_SUCCESS
+
+        for dxl_id in data_lengths:
+            data, dxl_result, error = self.readRx(port, dxl_id, data_lengths[dxl_id])
+            if dxl_result == COMM_SUCCESS:
+                data_dict[dxl_id] = [data, error, port.getCurrentTime()]
+            elif result == COMM_SUCCESS:
+                result = dxl_result
+
+        return data_dict, result
+
+    def fastBulkReadTx(self, port, param, param_length):
+        return COMM_NOT_AVAILABLE
+
     def bulkWriteTxOnly(self, port, param, param_length):
         return COMM_NOT_AVAILABLE
@@ -20,6 +20,7 @@
 # Author: Ryu Woon Jung (Leon)
 
 from .robotis_def import *
+from .crc16 import *
 
 TXPACKET_MAX_LEN = 1 * 1024
 RXPACKET_MAX_LEN = 1 * 1024
@@ -36,6 +37,13 @@ PKT_INSTRUCTION = 7
 PKT_ERROR = 8
 PKT_PARAMETER0 = 8
 
+PACKET_HEADER = b'\xff\xff\xfd'
+STATUS_PACKET_MIN_LEN = 11  # HEADER0 HEADER1 HEADER2 RESERVED ID LENGTH_L LENGTH_H INST ERROR CRC16_L CRC16_H
+
+# Byte stuffing: FF FF FD inside a packet is sent as FF FF FD FD
+STUFFING_PATTERN = b'\xff\xff\xfd'
+STUFFED_PATTERN = b'\xff\xff\xfd\xfd'
+
 # Protocol 2.0 Error bit
 ERRNUM_RESULT_FAIL = 1  # Failed to process the instruction packet.
 ERRNUM_INSTRUCTION = 2  # Instruction error
@@ -48,6 +56,94 @@ ERRNUM_ACCESS = 7  # Access error
 ERRBIT_ALERT = 128  # When the device has a problem, this bit is set to 1. Check "Device Status Check" value.
 
 
+# Incremental status packet parser, one per port. Bytes are fed in whatever chunks
+# the port returns; complete CRC-checked packets come out of getPacket() and a
+# partial trailing packet stays buffered for the next read.
+class Protocol2PacketParser(object):
+    def __init__(self, max_id=0xFC):
+        self.buffer = bytearray()
+        self.offset = 0  # start of the unparsed bytes in buffer
+        self.max_id = max_id
+
+    def clear(self):
+        del self.buffer[:]
+        self.offset = 0
+
+    def feed(self, data):
+        # parsed bytes are dropped in one go once they make up half the buffer
+        if self.offset > 0 and self.offset * 2 >= len(self.buffer):
+            del self.buffer[:self.offset]
+            self.offset = 0
+
+        self.buffer.extend(data)
+
+    def getBufferedLength(self):
+        return len(self.buffer) - self.offset
+
+    def getWaitLength(self):
+        # bytes still missing for the packet at the head of the buffer
+        buf = self.buffer
+        start = self.offset
+        rx_length = len(buf) - start
+
+        if rx_length > PKT_LENGTH_H and buf.startswith(PACKET_HEADER, start):
+            wait_length = DXL_MAKEWORD(buf[start + PKT_LENGTH_L], buf[start + PKT_LENGTH_H]) + PKT_LENGTH_H + 1
+        else:
+            wait_length = STATUS_PACKET_MIN_LEN
+
+        return max(wait_length - rx_length, 1)
+
+    def findHeader(self):
+        # skips to the next plausible status packet header, False until it is in
+        buf = self.buffer
+
+        while True:
+            start = buf.find(PACKET_HEADER, self.offset)
+            if start < 0:
+                # keep a possibly split header (FF or FF FF) at the end
+                self.offset = max(self.offset, len(buf) - 2)
+                return False
+
+            self.offset = start
+            if len(buf) - start <= PKT_INSTRUCTION:
+                return False
+
+            length = DXL_MAKEWORD(buf[start + PKT_LENGTH_L], buf[start + PKT_LENGTH_H])
+            if buf[start + PKT_RESERVED] != 0x00 or buf[start + PKT_ID] > self.max_id or \
+                    length < 4 or length > RXPACKET_MAX_LEN or buf[start + PKT_INSTRUCTION] != 0x55:
+                # not a header (stuffed data, noise): resync after it
+                self.offset = start + 1
+                continue
+
+            return True
+
+    def getPacket(self):
+        # (packet, COMM_SUCCESS), ([], COMM_RX_CORRUPT) on a CRC mismatch or ([], COMM_RX_WAITING)
+        if not self.findHeader():
+            return [], COMM_RX_WAITING
+
+        buf = self.buffer
+        start = self.offset
+        total_length = DXL_MAKEWORD(buf[start + PKT_LENGTH_L], buf[start + PKT_LENGTH_H]) + PKT_LENGTH_H + 1
+        if len(buf) - start < total_length:
+            return [], COMM_RX_WAITING
+
+        end = start + total_length
+        crc = DXL_MAKEWORD(buf[end - 2], buf[end - 1])
+        if updateCRC(0, buf, total_length - 2, start) != crc:
+            # drop the header only; the real next packet may start inside
+            self.offset = start + len(PACKET_HEADER)
+            return [], COMM_RX_CORRUPT
+
+        packet = buf[start:end]
+        if end == len(buf):
+            self.clear()
+        else:
+            self.offset = end
+
+        return packet, COMM_SUCCESS
+
+
 class Protocol2PacketHandler(object):
     def getProtocolVersion(self):
         return 2.0
@@ -106,114 +202,66 @@ class Protocol2PacketHandler(object):
             return "[RxPacketError] Unknown error code!"
 
     def updateCRC(self, crc_accum, data_blk_ptr, data_blk_size):
-        crc_table = [0x0000,
-                     0x8005, 0x800F, 0x000A, 0x801B, 0x001E, 0x0014, 0x8011,
-                     0x8033, 0x0036, 0x003C, 0x8039, 0x0028, 0x802D, 0x8027,
-                     0x0022, 0x8063, 0x0066, 0x006C, 0x8069, 0x0078, 0x807D,
-                     0x8077, 0x0072, 0x0050, 0x8055, 0x805F, 0x005A, 0x804B,
-                     0x004E, 0x0044, 0x8041, 0x80C3, 0x00C6, 0x00CC, 0x80C9,
-                     0x00D8, 0x80DD, 0x80D7, 0x00D2, 0x00F0, 0x80F5, 0x80FF,
-                     0x00FA, 0x80EB, 0x00EE, 0x00E4, 0x80E1, 0x00A0, 0x80A5,
-                     0x80AF, 0x00AA, 0x80BB, 0x00BE, 0x00B4, 0x80B1, 0x8093,
-                     0x0096, 0x009C, 0x8099, 0x0088, 0x808D, 0x8087, 0x0082,
-                     0x8183, 0x0186, 0x018C, 0x8189, 0x0198, 0x819D, 0x8197,
-                     0x0192, 0x01B0, 0x81B5, 0x81BF, 0x01BA, 0x81AB, 0x01AE,
-                     0x01A4, 0x81A1, 0x01E0, 0x81E5, 0x81EF, 0x01EA, 0x81FB,
-                     0x01FE, 0x01F4, 0x81F1, 0x81D3, 0x01D6, 0x01DC, 0x81D9,
-                     0x01C8, 0x81CD, 0x81C7, 0x01C2, 0x0140, 0x8145, 0x814F,
-                     0x014A, 0x815B, 0x015E, 0x0154, 0x8151, 0x8173, 0x0176,
-                     0x017C, 0x8179, 0x0168, 0x816D, 0x8167, 0x0162, 0x8123,
-                     0x0126, 0x012C, 0x8129, 0x0138, 0x813D, 0x8137, 0x0132,
-                     0x0110, 0x8115, 0x811F, 0x011A, 0x810B, 0x010E, 0x0104,
-                     0x8101, 0x8303, 0x0306, 0x030C, 0x8309, 0x0318, 0x831D,
-                     0x8317, 0x0312, 0x0330, 0x8335, 0x833F, 0x033A, 0x832B,
-                     0x032E, 0x0324, 0x8321, 0x0360, 0x8365, 0x836F, 0x036A,
-                     0x837B, 0x037E, 0x0374, 0x8371, 0x8353, 0x0356, 0x035C,
-                     0x8359, 0x0348, 0x834D, 0x8347, 0x0342, 0x03C0, 0x83C5,
-                     0x83CF, 0x03CA, 0x83DB, 0x03DE, 0x03D4, 0x83D1, 0x83F3,
-                     0x03F6, 0x03FC, 0x83F9, 0x03E8, 0x83ED, 0x83E7, 0x03E2,
-                     0x83A3, 0x03A6, 0x03AC, 0x83A9, 0x03B8, 0x83BD, 0x83B7,
-                     0x03B2, 0x0390, 0x8395, 0x839F, 0x039A, 0x838B, 0x038E,
-                     0x0384, 0x8381, 0x0280, 0x8285, 0x828F, 0x028A, 0x829B,
-                     0x029E, 0x0294, 0x8291, 0x82B3, 0x02B6, 0x02BC, 0x82B9,
-                     0x02A8, 0x82AD, 0x82A7, 0x02A2, 0x82E3, 0x02E6, 0x02EC,
-                     0x82E9, 0x02F8, 0x82FD, 0x82F7, 0x02F2, 0x02D0, 0x82D5,
-                     0x82DF, 0x02DA, 0x82CB, 0x02CE, 0x02C4, 0x82C1, 0x8243,
-                     0x0246, 0x024C, 0x8249, 0x0258, 0x825D, 0x8257, 0x0252,
-                     0x0270, 0x8275, 0x827F, 0x027A, 0x826B, 0x026E, 0x0264,
-                     0x8261, 0x0220, 0x8225, 0x822F, 0x022A, 0x823B, 0x023E,
-                     0x0234, 0x8231, 0x8213, 0x0216, 0x021C, 0x8219, 0x0208,
-                     0x820D, 0x8207, 0x0202]
-
-        for j in range(0, data_blk_size):
-            i = ((crc_accum >> 8) ^ data_blk_ptr[j]) & 0xFF
-            crc_accum = ((crc_accum << 8) ^ crc_table[i]) & 0xFFFF
-
-        return crc_accum
+        return updateCRC(crc_accum, data_blk_ptr, data_blk_size)
 
-    def addStuffing(self, packet):
-        packet_length_in = DXL_MAKEWORD(packet[PKT_LENGTH_L], packet[PKT_LENGTH_H])
-        packet_length_out = packet_length_in
+    def findPattern(self, packet, pattern, start, end):
+        # positions of a (non self-overlapping) pattern, found by the C level bytes search
+        data = packet if isinstance(packet, (bytearray, bytes)) else bytearray(packet)
 
-        temp = [0] * TXPACKET_MAX_LEN
+        positions = []
+        index = data.find(pattern, start, end)
+        while index >= 0:
+            positions.append(index)
+            index = data.find(pattern, index + len(pattern), end)
 
-        # FF FF FD XX ID LEN_L LEN_H
-        temp[PKT_HEADER0: PKT_HEADER0 + PKT_LENGTH_H + 1] = packet[PKT_HEADER0: PKT_HEADER0 + PKT_LENGTH_H + 1]
+        return positions
 
-        index = PKT_INSTRUCTION
+    def getPacketParser(self, port):
+        parser = getattr(port, 'packet_parser', None)
+        if parser is None:
+            parser = port.packet_parser = Protocol2PacketParser()
 
-        for i in range(0, packet_length_in - 2):  # except CRC
-            temp[index] = packet[i + PKT_INSTRUCTION]
-            index = index + 1
-            if packet[i + PKT_INSTRUCTION] == 0xFD \
-                    and packet[i + PKT_INSTRUCTION - 1] == 0xFF \
-                    and packet[i + PKT_INSTRUCTION - 2] == 0xFF:
-                # FF FF FD
-                temp[index] = 0xFD
-                index = index + 1
-                packet_length_out = packet_length_out + 1
+        return parser
 
-        temp[index] = packet[PKT_INSTRUCTION + packet_length_in - 2]
-        temp[index + 1] = packet[PKT_INSTRUCTION + packet_length_in - 1]
-        index = index + 2
+    def addStuffing(self, packet):
+        # stuffs in place: the packet (list or bytearray) grows by one byte per FF FF FD
+        packet_length_in = DXL_MAKEWORD(packet[PKT_LENGTH_L], packet[PKT_LENGTH_H])
 
-        if packet_length_in != packet_length_out:
-            packet = [0] * index
+        # FF FF FD ending anywhere from the instruction up to the CRC
+        positions = self.findPattern(packet, STUFFING_PATTERN, PKT_INSTRUCTION - 2,
+                                     PKT_INSTRUCTION + packet_length_in - 2)
+        if not positions:
+            return packet
 
-        packet[0: index] = temp[0: index]
+        # insert from the back so the earlier positions stay valid
+        for index in reversed(positions):
+            packet[index + 3: index + 3] = [0xFD]
 
+        packet_length_out = packet_length_in + len(positions)
         packet[PKT_LENGTH_L] = DXL_LOBYTE(packet_length_out)
         packet[PKT_LENGTH_H] = DXL_HIBYTE(packet_length_out)
 
         return packet
 
     def removeStuffing(self, packet):
+        # unstuffs in place: one FD is dropped per FF FF FD FD
         packet_length_in = DXL_MAKEWORD(packet[PKT_LENGTH_L], packet[PKT_LENGTH_H])
-        packet_length_out = packet_length_in
-
-        index = PKT_INSTRUCTION
-        for i in range(0, (packet_length_in - 2)):  # except CRC
-            if (packet[i + PKT_INSTRUCTION] == 0xFD) and (packet[i + PKT_INSTRUCTION + 1] == 0xFD) and (
-                    packet[i + PKT_INSTRUCTION - 1] == 0xFF) and (packet[i + PKT_INSTRUCTION - 2] == 0xFF):
-                # FF FF FD FD
-                packet_length_out = packet_length_out - 1
-            else:
-                packet[index] = packet[i + PKT_INSTRUCTION]
-                index += 1
 
-        packet[index] = packet[PKT_INSTRUCTION + packet_length_in - 2]
-        packet[index + 1] = packet[PKT_INSTRUCTION + packet_length_in - 1]
+        positions = self.findPattern(packet, STUFFED_PATTERN, PKT_INSTRUCTION - 2,
+                                     PKT_INSTRUCTION + packet_length_in - 1)
+        if not positions:
+            return packet
+
+        for index in reversed(positions):
+            del packet[index + 3]
 
+        packet_length_out = packet_length_in - len(positions)
         packet[PKT_LENGTH_L] = DXL_LOBYTE(packet_length_out)
         packet[PKT_LENGTH_H] = DXL_HIBYTE(packet_length_out)
 
         return packet
 
-    def txPacket(self, port, txpacket):
-        if port.is_using:
-            return COMM_PORT_BUSY
-        port.is_using = True
-
+    def makePacket(self, txpacket):
         # byte stuffing for header
         self.addStuffing(txpacket)
 
@@ -222,7 +270,6 @@ class Protocol2PacketHandler(object):
         # 7: HEADER0 HEADER1 HEADER2 RESERVED ID LENGTH_L LENGTH_H
 
         if total_packet_length > TXPACKET_MAX_LEN:
-            port.is_using = False
             return COMM_TX_ERROR
 
         # make packet header
@@ -237,84 +284,109 @@ class Protocol2PacketHandler(object):
         txpacket[total_packet_length - 2] = DXL_LOBYTE(crc)
         txpacket[total_packet_length - 1] = DXL_HIBYTE(crc)
 
-        # tx packet
+        return COMM_SUCCESS
+
+    def writePacket(self, port, txpacket, total_packet_length):
         port.clearPort()
-        written_packet_length = port.writePort(txpacket)
+        self.getPacketParser(port).clear()
+        if isinstance(txpacket, bytearray):
+            # written through a view, without a copy. The view is let go at once: a
+            # bytearray with views cannot be resized (see getTxBuffer)
+            packet_view = memoryview(txpacket)[0: total_packet_length]
+            try:
+                written_packet_length = port.writePort(packet_view)
+            finally:
+                if hasattr(packet_view, 'release'):  # Python 3
+                    packet_view.release()
+                del packet_view
+        else:
+            written_packet_length = port.writePort(txpacket[0: total_packet_length])
+
         if total_packet_length != written_packet_length:
-            port.is_using = False
             return COMM_TX_FAIL
 
         return COMM_SUCCESS
 
-    def rxPacket(self, port):
-        rxpacket = []
+    def txPacket(self, port, txpacket):
+        if not port.acquirePort():
+            return COMM_PORT_BUSY
 
-        result = COMM_TX_FAIL
-        rx_length = 0
-        wait_length = 11  # minimum length (HEADER0 HEADER1 HEADER2 RESERVED ID LENGTH_L LENGTH_H INST ERROR CRC16_L CRC16_H)
+        try:
+            result = self.makePacket(txpacket)
+            if result == COMM_SUCCESS:
+                result = self.writePacket(port, txpacket,
+                                          DXL_MAKEWORD(txpacket[PKT_LENGTH_L], txpacket[PKT_LENGTH_H]) + 7)
+        except BaseException:
+            # a transport error must not leave the port locked
+            port.releasePort()
+            raise
 
-        while True:
-            rxpacket.extend(port.readPort(wait_length - rx_length))
-            rx_length = len(rxpacket)
-            if rx_length >= wait_length:
-                # find packet header
-                for idx in range(0, (rx_length - 3)):
-                    if (rxpacket[idx] == 0xFF) and (rxpacket[idx + 1] == 0xFF) and (rxpacket[idx + 2] == 0xFD) and (
-                            rxpacket[idx + 3] != 0xFD):
-                        break
+        if result != COMM_SUCCESS:
+            port.releasePort()
 
-                if idx == 0:
-                    if (rxpacket[PKT_RESERVED] != 0x00) or (rxpacket[PKT_ID] > 0xFC) or (
-                            DXL_MAKEWORD(rxpacket[PKT_LENGTH_L], rxpacket[PKT_LENGTH_H]) > RXPACKET_MAX_LEN) or (
-                            rxpacket[PKT_INSTRUCTION] != 0x55):
-                        # remove the first byte in the packet
-                        del rxpacket[0]
-                        rx_length -= 1
-                        continue
-
-                    if wait_length != (DXL_MAKEWORD(rxpacket[PKT_LENGTH_L], rxpacket[PKT_LENGTH_H]) + PKT_LENGTH_H + 1):
-                        wait_length = DXL_MAKEWORD(rxpacket[PKT_LENGTH_L], rxpacket[PKT_LENGTH_H]) + PKT_LENGTH_H + 1
-                        continue
-
-                    if rx_length < wait_length:
-                        if port.isPacketTimeout():
-                            if rx_length == 0:
-                                result = COMM_RX_TIMEOUT
-                            else:
-                                result = COMM_RX_CORRUPT
-                            break
-                        else:
-                            continue
+        return result
 
-                    crc = DXL_MAKEWORD(rxpacket[wait_length - 2], rxpacket[wait_length - 1])
+    def txPackets(self, port, txpackets):
+        # several instruction packets in a single port write (one USB transfer)
+        if not port.acquirePort():
+            return COMM_PORT_BUSY
 
-                    if self.updateCRC(0, rxpacket, wait_length - 2) == crc:
-                        result = COMM_SUCCESS
-                    else:
-                        result = COMM_RX_CORRUPT
-                    break
+        try:
+            total_packet_length = 0
+            for txpacket in txpackets:
+                result = self.makePacket(txpacket)
+                if result != COMM_SUCCESS:
+                    port.releasePort()
+                    return result
+                total_packet_length += DXL_MAKEWORD(txpacket[PKT_LENGTH_L], txpacket[PKT_LENGTH_H]) + 7
+
+            packet = port.getTxBuffer(tuple(txpacket[PKT_INSTRUCTION] for txpacket in txpackets), total_packet_length)
+            index = 0
+            for txpacket in txpackets:
+                packet_length = DXL_MAKEWORD(txpacket[PKT_LENGTH_L], txpacket[PKT_LENGTH_H]) + 7
+                packet[index: index + packet_length] = txpacket[0: packet_length]
+                index += packet_length
+
+            result = self.writePacket(port, packet, total_packet_length)
+        except BaseException:
+            port.releasePort()
+            raise
 
-                else:
-                    # remove unnecessary packets
-                    del rxpacket[0: idx]
-                    rx_length -= idx
+        if result != COMM_SUCCESS:
+            port.releasePort()
 
-            else:
-                if port.isPacketTimeout():
+        return result
+
+    def rxPacket(self, port):
+        parser = self.getPacketParser(port)
+        rx_length = parser.getBufferedLength()
+
+        try:
+            # a packet left over from the previous read is returned without touching the port
+            rxpacket, result = parser.getPacket()
+            while result == COMM_RX_WAITING:
+                wait_length = parser.getWaitLength()
+                data = port.readPort(wait_length)
+                rx_length += len(data)
+                parser.feed(data)
+
+                # only a short read means the bus went quiet; a full one may just have
+                # revealed a longer packet
+                rxpacket, result = parser.getPacket()
+                if result == COMM_RX_WAITING and len(data) < wait_length and port.isPacketTimeout():
                     if rx_length == 0:
                         result = COMM_RX_TIMEOUT
                     else:
                         result = COMM_RX_CORRUPT
-                    break
-
-        port.is_using = False
+        finally:
+            port.releasePort()
 
         if result == COMM_SUCCESS:
             rxpacket = self.removeStuffing(rxpacket)
 
         return rxpacket, result
 
-    # NOT for BulkRead / SyncRead instruction
+    # NOT for BulkRead / SyncRead / FastSyncRead / FastBulkRead instruction
     def txRxPacket(self, port, txpacket):
         rxpacket = None
         error = 0
@@ -325,13 +397,13 @@ class Protocol2PacketHandler(object):
             return rxpacket, result, error
 
         # (Instruction == BulkRead or SyncRead) == this function is not available.
-        if txpacket[PKT_INSTRUCTION] == INST_BULK_READ or txpacket[PKT_INSTRUCTION] == INST_SYNC_READ:
+        if txpacket[PKT_INSTRUCTION] in (INST_BULK_READ, INST_SYNC_READ, INST_FAST_SYNC_READ, INST_FAST_BULK_READ):
             result = COMM_NOT_AVAILABLE
 
         # (ID == Broadcast ID) == no need to wait for status packet or not available.
         # (Instruction == action) == no need to wait for status packet
         if txpacket[PKT_ID] == BROADCAST_ID or txpacket[PKT_INSTRUCTION] == INST_ACTION:
-            port.is_using = False
+            port.releasePort()
             return rxpacket, result, error
 
         # set packet timeout
@@ -356,7 +428,7 @@ class Protocol2PacketHandler(object):
         model_number = 0
         error = 0
 
-        txpacket = [0] * 10
+        txpacket = port.getTxBuffer(INST_PING, 10)
 
         if dxl_id >= BROADCAST_ID:
             return model_number, COMM_NOT_AVAILABLE, error
@@ -380,8 +452,7 @@ class Protocol2PacketHandler(object):
         rx_length = 0
         wait_length = STATUS_LENGTH * MAX_ID
 
-        txpacket = [0] * 10
-        rxpacket = []
+        txpacket = port.getTxBuffer(INST_PING, 10)
 
         tx_time_per_byte = (1000.0 / port.getBaudRate()) *10.0;
 
@@ -392,68 +463,49 @@ class Protocol2PacketHandler(object):
 
         result = self.txPacket(port, txpacket)
         if result != COMM_SUCCESS:
-            port.is_using = False
             return data_list, result
 
         # set rx timeout
         #port.setPacketTimeout(wait_length * 1)
-        port.setPacketTimeoutMillis((wait_length * tx_time_per_byte) + (3.0 * MAX_ID) + 16.0);
-
-        while True:
-            rxpacket += port.readPort(wait_length - rx_length)
-            rx_length = len(rxpacket)
+        port.setPacketTimeoutMillis((wait_length * tx_time_per_byte) + (3.0 * MAX_ID) + port.getLatencyTimer());
 
-            if port.isPacketTimeout():  # or rx_length >= wait_length
-                break
+        parser = self.getPacketParser(port)
+        try:
+            while True:
+                data = port.readPort(wait_length - rx_length)
+                rx_length += len(data)
+                parser.feed(data)
 
-        port.is_using = False
+                if port.isPacketTimeout():  # or rx_length >= wait_length
+                    break
+        finally:
+            port.releasePort()
 
         if rx_length == 0:
             return data_list, COMM_RX_TIMEOUT
 
+        result = COMM_RX_CORRUPT
         while True:
-            if rx_length < STATUS_LENGTH:
-                return data_list, COMM_RX_CORRUPT
-
-            # find packet header
-            for idx in range(0, rx_length - 2):
-                if rxpacket[idx] == 0xFF and rxpacket[idx + 1] == 0xFF and rxpacket[idx + 2] == 0xFD:
-                    break
-
-            if idx == 0:  # found at the beginning of the packet
-                # verify CRC16
-                crc = DXL_MAKEWORD(rxpacket[STATUS_LENGTH - 2], rxpacket[STATUS_LENGTH - 1])
-
-                if self.updateCRC(0, rxpacket, STATUS_LENGTH - 2) == crc:
-                    result = COMM_SUCCESS
-
-                    data_list[rxpacket[PKT_ID]] = [
-                        DXL_MAKEWORD(rxpacket[PKT_PARAMETER0 + 1], rxpacket[PKT_PARAMETER0 + 2]),
-                        rxpacket[PKT_PARAMETER0 + 3]]
-
-                    del rxpacket[0: STATUS_LENGTH]
-                    rx_length = rx_length - STATUS_LENGTH
-
-                    if rx_length == 0:
-                        return data_list, result
-
-                else:
-                    result = COMM_RX_CORRUPT
+            rxpacket, packet_result = parser.getPacket()
+            if packet_result == COMM_RX_WAITING:
+                break
 
-                    # remove header (0xFF 0xFF 0xFD)
-                    del rxpacket[0: 3]
-                    rx_length = rx_length - 3
+            result = packet_result
+            if result == COMM_SUCCESS:
+                rxpacket = self.removeStuffing(rxpacket)
+                data_list[rxpacket[PKT_ID]] = [
+                    DXL_MAKEWORD(rxpacket[PKT_PARAMETER0 + 1], rxpacket[PKT_PARAMETER0 + 2]),
+                    rxpacket[PKT_PARAMETER0 + 3]]
 
-            else:
-                # remove unnecessary packets
-                del rxpacket[0: idx]
-                rx_length = rx_length - idx
+        # trailing bytes that do not make up a packet
+        if parser.getBufferedLength() > 0:
+            result = COMM_RX_CORRUPT
+        parser.clear()
 
-        # FIXME: unreachable code
         return data_list, result
 
     def action(self, port, dxl_id):
-        txpacket = [0] * 10
+        txpacket = port.getTxBuffer(INST_ACTION, 10)
 
         txpacket[PKT_ID] = dxl_id
         txpacket[PKT_LENGTH_L] = 3
@@ -464,7 +516,7 @@ class Protocol2PacketHandler(object):
         return result
 
     def reboot(self, port, dxl_id):
-        txpacket = [0] * 10
+        txpacket = port.getTxBuffer(INST_REBOOT, 10)
 
         txpacket[PKT_ID] = dxl_id
         txpacket[PKT_LENGTH_L] = 3
@@ -475,7 +527,7 @@ class Protocol2PacketHandler(object):
         return result, error
 
     def clearMultiTurn(self, port, dxl_id):
-        txpacket = [0] * 15
+        txpacket = port.getTxBuffer(INST_CLEAR, 15)
 
         txpacket[PKT_ID] = dxl_id
         txpacket[PKT_LENGTH_L] = 8
@@ -491,7 +543,7 @@ class Protocol2PacketHandler(object):
         return result, error
 
     def factoryReset(self, port, dxl_id, option):
-        txpacket = [0] * 11
+        txpacket = port.getTxBuffer(INST_FACTORY_RESET, 11)
 
         txpacket[PKT_ID] = dxl_id
         txpacket[PKT_LENGTH_L] = 4
@@ -503,7 +555,7 @@ class Protocol2PacketHandler(object):
         return result, error
 
     def readTx(self, port, dxl_id, address, length):
-        txpacket = [0] * 14
+        txpacket = port.getTxBuffer(INST_READ, 14)
 
         if dxl_id >= BROADCAST_ID:
             return COMM_NOT_AVAILABLE
@@ -548,7 +600,7 @@ class Protocol2PacketHandler(object):
     def readTxRx(self, port, dxl_id, address, length):
         error = 0
 
-        txpacket = [0] * 14
+        txpacket = port.getTxBuffer(INST_READ, 14)
         data = []
 
         if dxl_id >= BROADCAST_ID:
@@ -613,7 +665,7 @@ class Protocol2PacketHandler(object):
         return data_read, result, error
 
     def writeTxOnly(self, port, dxl_id, address, length, data):
-        txpacket = [0] * (length + 12)
+        txpacket = port.getTxBuffer(INST_WRITE, length + 12)
 
         txpacket[PKT_ID] = dxl_id
         txpacket[PKT_LENGTH_L] = DXL_LOBYTE(length + 5)
@@ -625,12 +677,13 @@ class Protocol2PacketHandler(object):
         txpacket[PKT_PARAMETER0 + 2: PKT_PARAMETER0 + 2 + length] = data[0: length]
 
         result = self.txPacket(port, txpacket)
-        port.is_using = False
+        if result == COMM_SUCCESS:
+            port.releasePort()
 
         return result
 
     def writeTxRx(self, port, dxl_id, address, length, data):
-        txpacket = [0] * (length + 12)
+        txpacket = port.getTxBuffer(INST_WRITE, length + 12)
 
         txpacket[PKT_ID] = dxl_id
         txpacket[PKT_LENGTH_L] = DXL_LOBYTE(length + 5)
@@ -675,7 +728,7 @@ class Protocol2PacketHandler(object):
         return self.writeTxRx(port, dxl_id, address, 4, data_write)
 
     def regWriteTxOnly(self, port, dxl_id, address, length, data):
-        txpacket = [0] * (length + 12)
+        txpacket = port.getTxBuffer(INST_REG_WRITE, length + 12)
 
         txpacket[PKT_ID] = dxl_id
         txpacket[PKT_LENGTH_L] = DXL_LOBYTE(length + 5)
@@ -687,12 +740,13 @@ class Protocol2PacketHandler(object):
         txpacket[PKT_PARAMETER0 + 2: PKT_PARAMETER0 + 2 + length] = data[0: length]
 
         result = self.txPacket(port, txpacket)
-        port.is_using = False
+        if result == COMM_SUCCESS:
+            port.releasePort()
 
         return result
 
     def regWriteTxRx(self, port, dxl_id, address, length, data):
-        txpacket = [0] * (length + 12)
+        txpacket = port.getTxBuffer(INST_REG_WRITE, length + 12)
 
         txpacket[PKT_ID] = dxl_id
         txpacket[PKT_LENGTH_L] = DXL_LOBYTE(length + 5)
@@ -707,8 +761,9 @@ class Protocol2PacketHandler(object):
 
         return result, error
 
-    def syncReadTx(self, port, start_address, data_length, param, param_length):
-        txpacket = [0] * (param_length + 14)
+    def makeSyncPacket(self, port, instruction, start_address, data_length, param, param_length):
+        # Sync Read / Fast Sync Read / Sync Write instruction packet in the per-port tx buffer
+        txpacket = port.getTxBuffer(instruction, param_length + 14)
         # 14: HEADER0 HEADER1 HEADER2 RESERVED ID LEN_L LEN_H INST START_ADDR_L START_ADDR_H DATA_LEN_L DATA_LEN_H CRC16_L CRC16_H
 
         txpacket[PKT_ID] = BROADCAST_ID
@@ -716,7 +771,7 @@ class Protocol2PacketHandler(object):
             param_length + 7)  # 7: INST START_ADDR_L START_ADDR_H DATA_LEN_L DATA_LEN_H CRC16_L CRC16_H
         txpacket[PKT_LENGTH_H] = DXL_HIBYTE(
             param_length + 7)  # 7: INST START_ADDR_L START_ADDR_H DATA_LEN_L DATA_LEN_H CRC16_L CRC16_H
-        txpacket[PKT_INSTRUCTION] = INST_SYNC_READ
+        txpacket[PKT_INSTRUCTION] = instruction
         txpacket[PKT_PARAMETER0 + 0] = DXL_LOBYTE(start_address)
         txpacket[PKT_PARAMETER0 + 1] = DXL_HIBYTE(start_address)
         txpacket[PKT_PARAMETER0 + 2] = DXL_LOBYTE(data_length)
@@ -724,21 +779,156 @@ class Protocol2PacketHandler(object):
 
         txpacket[PKT_PARAMETER0 + 4: PKT_PARAMETER0 + 4 + param_length] = param[0: param_length]
 
+        return txpacket
+
+    def syncReadTx(self, port, start_address, data_length, param, param_length):
+        txpacket = self.makeSyncPacket(port, INST_SYNC_READ, start_address, data_length, param, param_length)
+
         result = self.txPacket(port, txpacket)
         if result == COMM_SUCCESS:
             port.setPacketTimeout((11 + data_length) * param_length)
 
         return result
 
+    def syncReadRx(self, port, data_length, dxl_id_list):
+        return self.rxStatusPackets(port, dict((dxl_id, data_length) for dxl_id in dxl_id_list))
+
+    def rxStatusPackets(self, port, data_lengths):
+        # collects the status packets of every id in data_lengths ({id: data length})
+        # from one burst: reads ask for all the bytes still expected and the parser
+        # demultiplexes them by id. Returns {id: [data, error, receive time]} and the
+        # result; ids missing from the dict failed with that result.
+        parser = self.getPacketParser(port)
+        data_dict = {}
+        result = COMM_SUCCESS
+
+        expected_length = 0
+        for dxl_id in data_lengths:
+            expected_length += data_lengths[dxl_id] + STATUS_PACKET_MIN_LEN
+        rx_length = parser.getBufferedLength()
+        is_timeout = False
+        corrupt_ids = set()
+
+        try:
+            while len(data_dict) + len(corrupt_ids) < len(data_lengths):
+                rxpacket, packet_result = parser.getPacket()
+
+                if packet_result == COMM_SUCCESS:
+                    rxpacket = self.removeStuffing(rxpacket)
+                    dxl_id = rxpacket[PKT_ID]
+                    if dxl_id in data_lengths and dxl_id not in data_dict and dxl_id not in corrupt_ids:
+                        # 4: INST ERROR CRC16_L CRC16_H
+                        data_length = DXL_MAKEWORD(rxpacket[PKT_LENGTH_L], rxpacket[PKT_LENGTH_H]) - 4
+                        if data_length == data_lengths[dxl_id]:
+                            data_dict[dxl_id] = [rxpacket[PKT_PARAMETER0 + 1: PKT_PARAMETER0 + 1 + data_length],
+                                                 rxpacket[PKT_ERROR], port.getCurrentTime()]
+                        else:
+                            # e.g. an error status without data; its data is not coming
+                            corrupt_ids.add(dxl_id)
+                            expected_length -= data_lengths[dxl_id] - data_length
+                            result = COMM_RX_CORRUPT
+                    continue
+
+                if packet_result == COMM_RX_CORRUPT:
+                    # the other devices' packets are still worth collecting
+                    result = COMM_RX_CORRUPT
+                    continue
+
+                if is_timeout:
+                    if result == COMM_SUCCESS:
+                        result = COMM_RX_TIMEOUT if parser.getBufferedLength() == 0 else COMM_RX_CORRUPT
+                    break
+
+                wait_length = expected_length - rx_length
+                if wait_length <= 0:
+                    if result != COMM_SUCCESS:
+                        # everything expected is in; a corrupted packet will not come again
+                        break
+                    # stuffed packets are longer than expected
+                    wait_length = parser.getWaitLength()
+
+                data = port.readPort(wait_length)
+                rx_length += len(data)
+                parser.feed(data)
+
+                is_timeout = len(data) < wait_length and port.isPacketTimeout()
+        finally:
+            port.releasePort()
+
+        return data_dict, result
+
+    def fastSyncReadTx(self, port, start_address, data_length, param, param_length):
+        txpacket = self.makeSyncPacket(port, INST_FAST_SYNC_READ, start_address, data_length, param, param_length)
+
+        result = self.txPacket(port, txpacket)
+        if result == COMM_SUCCESS:
+            # one status packet: HEADER0..INST + (ERROR ID DATA CRC16_L CRC16_H) per device
+            port.setPacketTimeout((4 + data_length) * param_length + 8)
+
+        return result
+
+    def fastSyncReadRx(self, port, data_length, dxl_id_list):
+        return self.fastReadRx(port, dict((dxl_id, data_length) for dxl_id in dxl_id_list))
+
+    def fastReadRx(self, port, data_lengths):
+        # Fast Sync/Bulk Read answer: a single status packet from BROADCAST_ID whose
+        # parameters are ERROR ID DATA CRC16_L CRC16_H per device, where the last CRC
+        # is the packet CRC. Returns {id: [data, error, receive time]} and the result.
+        parser = self.getPacketParser(port)
+        data_dict = {}
+
+        # the only status packet with the broadcast id
+        parser.max_id = BROADCAST_ID
+        try:
+            while True:
+                rxpacket, result = self.rxPacket(port)
+                if result != COMM_SUCCESS or rxpacket[PKT_ID] == BROADCAST_ID:
+                    break
+        finally:
+            parser.max_id = MAX_ID
+
+        if result != COMM_SUCCESS:
+            return data_dict, result
+
+        rx_time = port.getCurrentTime()
+        index = PKT_ERROR
+        end = DXL_MAKEWORD(rxpacket[PKT_LENGTH_L], rxpacket[PKT_LENGTH_H]) + PKT_LENGTH_H + 1
+        while index < end:
+            error = rxpacket[index]
+            dxl_id = rxpacket[index + 1] if index + 1 < end else None
+            if dxl_id not in data_lengths or dxl_id in data_dict or index + 4 + data_lengths[dxl_id] > end:
+                # the devices' chunks do not line up (e.g. one without data): nothing is trusted
+                return {}, COMM_RX_CORRUPT
+
+            data_length = data_lengths[dxl_id]
+            data_dict[dxl_id] = [rxpacket[index + 2: index + 2 + data_length], error, rx_time]
+            index += data_length + 4  # 4: ERROR ID CRC16_L CRC16_H
+
+        if len(data_dict) < len(data_lengths):
+            return data_dict, COMM_RX_CORRUPT
+
+        return data_dict, COMM_SUCCESS
+
     def syncWriteTxOnly(self, port, start_address, data_length, param, param_length):
-        txpacket = [0] * (param_length + 14)
+        txpacket = self.makeSyncPacket(port, INST_SYNC_WRITE, start_address, data_length, param, param_length)
+
+        _, result, _ = self.txRxPacket(port, txpacket)
+
+        return result
+
+    def makeSyncWritePacket(self, start_address, data_length, param, param_length):
+        # Sync Write packet kept by the caller (e.g. GroupSyncWrite) across cycles: header
+        # and parameters in place, not stuffed, CRC left to preparedSyncWriteTxOnly
+        txpacket = bytearray(param_length + 14)
         # 14: HEADER0 HEADER1 HEADER2 RESERVED ID LEN_L LEN_H INST START_ADDR_L START_ADDR_H DATA_LEN_L DATA_LEN_H CRC16_L CRC16_H
 
+        txpacket[PKT_HEADER0] = 0xFF
+        txpacket[PKT_HEADER1] = 0xFF
+        txpacket[PKT_HEADER2] = 0xFD
+        txpacket[PKT_RESERVED] = 0x00
         txpacket[PKT_ID] = BROADCAST_ID
-        txpacket[PKT_LENGTH_L] = DXL_LOBYTE(
-            param_length + 7)  # 7: INST START_ADDR_L START_ADDR_H DATA_LEN_L DATA_LEN_H CRC16_L CRC16_H
-        txpacket[PKT_LENGTH_H] = DXL_HIBYTE(
-            param_length + 7)  # 7: INST START_ADDR_L START_ADDR_H DATA_LEN_L DATA_LEN_H CRC16_L CRC16_H
+        txpacket[PKT_LENGTH_L] = DXL_LOBYTE(param_length + 7)
+        txpacket[PKT_LENGTH_H] = DXL_HIBYTE(param_length + 7)
         txpacket[PKT_INSTRUCTION] = INST_SYNC_WRITE
         txpacket[PKT_PARAMETER0 + 0] = DXL_LOBYTE(start_address)
         txpacket[PKT_PARAMETER0 + 1] = DXL_HIBYTE(start_address)
@@ -747,12 +937,66 @@ class Protocol2PacketHandler(object):
 
         txpacket[PKT_PARAMETER0 + 4: PKT_PARAMETER0 + 4 + param_length] = param[0: param_length]
 
-        _, result, _ = self.txRxPacket(port, txpacket)
+        return txpacket
+
+    def preparedSyncWriteTxOnly(self, port, txpacket, crc_accum=0, crc_length=0):
+        # sends a packet from makeSyncWritePacket. crc_accum is the cached CRC of its first
+        # crc_length bytes, so only the rest is run through the CRC. Only the CRC bytes of
+        # txpacket are touched; a packet that needs stuffing is stuffed in a copy.
+        if not port.acquirePort():
+            return COMM_PORT_BUSY
+
+        try:
+            packet_length = DXL_MAKEWORD(txpacket[PKT_LENGTH_L], txpacket[PKT_LENGTH_H])
+            total_packet_length = packet_length + 7
+
+            if self.findPattern(txpacket, STUFFING_PATTERN, PKT_INSTRUCTION - 2, PKT_INSTRUCTION + packet_length - 2):
+                stuffed_packet = port.getTxBuffer(INST_SYNC_WRITE, total_packet_length)
+                stuffed_packet[0: total_packet_length] = txpacket[0: total_packet_length]
+
+                result = self.makePacket(stuffed_packet)
+                if result == COMM_SUCCESS:
+                    result = self.writePacket(port, stuffed_packet,
+                                              DXL_MAKEWORD(stuffed_packet[PKT_LENGTH_L], stuffed_packet[PKT_LENGTH_H]) + 7)
+            elif total_packet_length > TXPACKET_MAX_LEN:
+                result = COMM_TX_ERROR
+            else:
+                crc = updateCRC(crc_accum, txpacket, total_packet_length - 2 - crc_length, crc_length)
+                txpacket[total_packet_length - 2] = DXL_LOBYTE(crc)
+                txpacket[total_packet_length - 1] = DXL_HIBYTE(crc)
+
+                result = self.writePacket(port, txpacket, total_packet_length)
+        finally:
+            # broadcast: no status packet to wait for
+            port.releasePort()
+
+        return result
+
+    def syncWriteSyncReadTx(self, port, write_packet, read_start_address, read_data_length, read_param,
+                            read_param_length, read_instruction=INST_SYNC_READ):
+        # a Sync Write packet from makeSyncWritePacket followed by Sync Read (or Fast Sync
+        # Read) in one port write; the broadcast write has no answer, so only the read
+        # status packets come back
+        write_packet_length = DXL_MAKEWORD(write_packet[PKT_LENGTH_L], write_packet[PKT_LENGTH_H]) + 7
+        write_txpacket = port.getTxBuffer(INST_SYNC_WRITE, write_packet_length)
+        write_txpacket[0: write_packet_length] = write_packet[0: write_packet_length]
+
+        read_txpacket = self.makeSyncPacket(port, read_instruction, read_start_address, read_data_length,
+                                            read_param, read_param_length)
+
+        result = self.txPackets(port, [write_txpacket, read_txpacket])
+        if result == COMM_SUCCESS:
+            # the read answers start once the write packet is off the wire
+            write_packet_length = DXL_MAKEWORD(write_txpacket[PKT_LENGTH_L], write_txpacket[PKT_LENGTH_H]) + 7
+            if read_instruction == INST_FAST_SYNC_READ:
+                port.setPacketTimeout(write_packet_length + (4 + read_data_length) * read_param_length + 8)
+            else:
+                port.setPacketTimeout(write_packet_length + (11 + read_data_length) * read_param_length)
 
         return result
 
     def bulkReadTx(self, port, param, param_length):
-        txpacket = [0] * (param_length + 10)
+        txpacket = port.getTxBuffer(INST_BULK_READ, param_length + 10)
         # 10: HEADER0 HEADER1 HEADER2 RESERVED ID LEN_L LEN_H INST CRC16_L CRC16_H
 
         txpacket[PKT_ID] = BROADCAST_ID
@@ -773,8 +1017,33 @@ class Protocol2PacketHandler(object):
 
         return result
 
+    def bulkReadRx(self, port, data_lengths):
+        return self.rxStatusPackets(port, data_lengths)
+
+    def fastBulkReadTx(self, port, param, param_length):
+        txpacket = port.getTxBuffer(INST_FAST_BULK_READ, param_length + 10)
+        # 10: HEADER0 HEADER1 HEADER2 RESERVED ID LEN_L LEN_H INST CRC16_L CRC16_H
+
+        txpacket[PKT_ID] = BROADCAST_ID
+        txpacket[PKT_LENGTH_L] = DXL_LOBYTE(param_length + 3)  # 3: INST CRC16_L CRC16_H
+        txpacket[PKT_LENGTH_H] = DXL_HIBYTE(param_length + 3)  # 3: INST CRC16_L CRC16_H
+        txpacket[PKT_INSTRUCTION] = INST_FAST_BULK_READ
+
+        txpacket[PKT_PARAMETER0: PKT_PARAMETER0 + param_length] = param[0: param_length]
+
+        result = self.txPacket(port, txpacket)
+        if result == COMM_SUCCESS:
+            wait_length = 8  # HEADER0 HEADER1 HEADER2 RESERVED ID LEN_L LEN_H INST
+            i = 0
+            while i < param_length:
+                wait_length += DXL_MAKEWORD(param[i + 3], param[i + 4]) + 4
+                i += 5
+            port.setPacketTimeout(wait_length)
+
+        return result
+
     def bulkWriteTxOnly(self, port, param, param_length):
-        txpacket = [0] * (param_length + 10)
+        txpacket = port.getTxBuffer(INST_BULK_WRITE, param_length + 10)
         # 10: HEADER0 HEADER1 HEADER2 RESERVED ID LEN_L LEN_H INST CRC16_L CRC16_H
 
         txpacket[PKT_ID] = BROADCAST_ID
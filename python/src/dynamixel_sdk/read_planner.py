@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+from .robotis_def import *
+from .group_sync_read import *
+from .group_bulk_read import *
+from .group_fast_sync_read import *
+from .group_fast_bulk_read import *
+
+READ_SYNC = 'sync'
+READ_FAST_SYNC = 'fast_sync'
+READ_BULK = 'bulk'
+READ_FAST_BULK = 'fast_bulk'
+
+# wire bytes of each read, Protocol 2.0 (header, reserved, id, length, instruction, crc)
+SYNC_READ_TX_LEN = 14  # + 1 per id: ... INST START_ADDR_L START_ADDR_H DATA_LEN_L DATA_LEN_H ID ... CRC16_L CRC16_H
+BULK_READ_TX_LEN = 10  # + 5 per id: ... INST ID ADDR_L ADDR_H LEN_L LEN_H ... CRC16_L CRC16_H
+STATUS_PACKET_LEN = 11  # + data: ... INST ERROR DATA ... CRC16_L CRC16_H
+FAST_READ_STATUS_LEN = 8  # + (ERROR ID DATA CRC16_L CRC16_H) per id
+FAST_READ_STATUS_MAX_LEN = 1024 + 7  # Protocol 2.0 RXPACKET_MAX_LEN + HEADER0 .. LEN_H
+
+# Protocol 1.0 bulk read
+BULK_READ_TX_LEN_1 = 7  # + 3 per id: HEADER0 HEADER1 ID LEN INST 0x00 LEN ID ADDR ... CHKSUM
+STATUS_PACKET_LEN_1 = 6  # + data: HEADER0 HEADER1 ID LEN ERROR DATA ... CHKSUM
+
+
+class ReadPlan(object):
+    # groups chosen by ReadPlanner.makePlan(), read one after another
+    def __init__(self, reads, groups, time):
+        self.reads = reads  # [(READ_*, {id: (address, length)})]
+        self.groups = groups
+        self.time = time  # estimated bus time of one txRxPacket, msec
+        self.group_dict = {}  # id: groups holding data of the id
+
+        for (_, ranges), group in zip(reads, groups):
+            for dxl_id in ranges:
+                self.group_dict.setdefault(dxl_id, []).append(group)
+
+    def getGroups(self):
+        return list(self.groups)
+
+    def getReads(self):
+        return list(self.reads)
+
+    def getTime(self):
+        return self.time
+
+    def txRxPacket(self):
+        # every group is read even if an earlier one fails; returns the first failure
+        result = COMM_SUCCESS
+        for group in self.groups:
+            group_result = group.txRxPacket()
+            if result == COMM_SUCCESS:
+                result = group_result
+
+        return result
+
+    def findGroup(self, dxl_id, address, data_length):
+        for group in self.group_dict.get(dxl_id, ()):
+            if group.isAvailable(dxl_id, address, data_length):
+                return group
+
+        return None
+
+    def isAvailable(self, dxl_id, address, data_length):
+        return self.findGroup(dxl_id, address, data_length) is not None
+
+    def getData(self, dxl_id, address, data_length):
+        group = self.findGroup(dxl_id, address, data_length)
+        if group is None:
+            return 0
+
+        return group.getData(dxl_id, address, data_length)
+
+
+class ReadPlanner(object):
+    # Picks the read instructions that cost the least bus time for a set of
+    # (id, address, length) fields. Fields of one id are merged into address ranges
+    # unless the gap between them costs more than a separate read; the ranges are
+    # then read with sync, bulk or fast reads, whichever is cheapest.
+    #
+    # The time of a read is modelled as
+    #   transaction_time + (tx bytes + rx bytes) * byte time + status packets * return_delay_time
+    # with times in msec. transaction_time covers the host side of one round trip
+    # (e.g. the USB latency timer); return_delay_time is the Return Delay Time of the devices.
+    def __init__(self, port, ph, baudrate=None, use_fast_read=False, return_delay_time=0.0, transaction_time=0.0):
+        self.port = port
+        self.ph = ph
+        self.baudrate = baudrate
+        self.use_fast_read = use_fast_read
+        self.return_delay_time = return_delay_time
+        self.transaction_time = transaction_time
+
+        self.field_dict = {}  # id: [(address, length)]
+
+    def addParam(self, dxl_id, address, data_length):
+        if data_length <= 0:
+            return False
+
+        fields = self.field_dict.setdefault(dxl_id, [])
+        if (address, data_length) not in fields:
+            fields.append((address, data_length))
+
+        return True
+
+    def removeParam(self, dxl_id):
+        if dxl_id not in self.field_dict:  # NOT exist
+            return
+
+        del self.field_dict[dxl_id]
+
+    def clearParam(self):
+        self.field_dict.clear()
+
+    def getByteTime(self):
+        # msec per byte on the wire (8N1: 10 bits)
+        baudrate = self.port.getBaudRate() if self.baudrate is None else self.baudrate
+        return 10000.0 / baudrate
+
+    def getReadBytes(self, read_type, ranges):
+        # (tx bytes, rx bytes, status packets) of one read
+        lengths = [ranges[dxl_id][1] for dxl_id in ranges]
+
+        if self.ph.getProtocolVersion() == 1.0:
+            return (BULK_READ_TX_LEN_1 + 3 * len(lengths),
+                    sum(STATUS_PACKET_LEN_1 + length for length in lengths), len(lengths))
+
+        if read_type == READ_SYNC or read_type == READ_FAST_SYNC:
+            tx_length = SYNC_READ_TX_LEN + len(lengths)
+        else:
+            tx_length = BULK_READ_TX_LEN + 5 * len(lengths)
+
+        if read_type == READ_FAST_SYNC or read_type == READ_FAST_BULK:
+            return tx_length, FAST_READ_STATUS_LEN + sum(4 + length for length in lengths), 1
+
+        return tx_length, sum(STATUS_PACKET_LEN + length for length in lengths), len(lengths)
+
+    def getReadTime(self, read_type, ranges):
+        tx_length, rx_length, status_packets = self.getReadBytes(read_type, ranges)
+        return self.transaction_time + (tx_length + rx_length) * self.getByteTime() + \
+            status_packets * self.return_delay_time
+
+    def getSplitLength(self):
+        # gap (bytes) above which a field is better read by a read of its own
+        time = self.getReadTime(READ_FAST_BULK if self.use_fast_read else READ_BULK, {0: (0, 0)})
+        return int(time / self.getByteTime())
+
+    def makeRanges(self, fields):
+        # merges the sorted fields of one id into (address, length) ranges
+        split_length = self.getSplitLength()
+        ranges = []
+
+        for address, data_length in sorted(fields):
+            if ranges:
+                start, end = ranges[-1]
+                if address - end <= split_length:
+                    ranges[-1] = (start, max(end, address + data_length))
+                    continue
+            ranges.append((address, address + data_length))
+
+        return [(start, end - start) for start, end in ranges]
+
+    def getCandidates(self, ranges):
+        # ways to read {id: (address, length)}: lists of (READ_*, ranges) reads
+        if self.ph.getProtocolVersion() == 1.0:
+            return [[(READ_BULK, ranges)]]
+
+        sync_types = [READ_SYNC]
+        bulk_types = [READ_BULK]
+        if self.use_fast_read:
+            sync_types.append(READ_FAST_SYNC)
+            bulk_types.append(READ_FAST_BULK)
+
+        # one sync read over the span of all the ranges
+        start = min(ranges[dxl_id][0] for dxl_id in ranges)
+        end = max(ranges[dxl_id][0] + ranges[dxl_id][1] for dxl_id in ranges)
+        span = dict((dxl_id, (start, end - start)) for dxl_id in ranges)
+
+        candidates = [[(read_type, span)] for read_type in sync_types]
+        candidates += [[(read_type, ranges)] for read_type in bulk_types]
+
+        # ids sharing the most common range in a sync read, the others in a bulk read
+        clusters = {}
+        for dxl_id in ranges:
+            clusters.setdefault(ranges[dxl_id], []).append(dxl_id)
+        common = max(clusters.values(), key=len)
+        if 1 < len(common) < len(ranges):
+            shared = dict((dxl_id, ranges[dxl_id]) for dxl_id in common)
+            others = dict((dxl_id, ranges[dxl_id]) for dxl_id in ranges if dxl_id not in shared)
+            candidates += [[(sync_type, shared), (bulk_type, others)]
+                           for sync_type in sync_types for bulk_type in bulk_types]
+
+        return [reads for reads in candidates if all(self.isReadable(read_type, read_ranges)
+                                                     for read_type, read_ranges in reads)]
+
+    def isReadable(self, read_type, ranges):
+        if read_type == READ_FAST_SYNC or read_type == READ_FAST_BULK:
+            return self.getReadBytes(read_type, ranges)[1] <= FAST_READ_STATUS_MAX_LEN
+
+        return True
+
+    def makeGroup(self, read_type, ranges):
+        if read_type == READ_SYNC or read_type == READ_FAST_SYNC:
+            start_address, data_length = ranges[next(iter(ranges))]
+            group_class = GroupSyncRead if read_type == READ_SYNC else GroupFastSyncRead
+            group = group_class(self.port, self.ph, start_address, data_length)
+            for dxl_id in sorted(ranges):
+                group.addParam(dxl_id)
+        else:
+            group = (GroupBulkRead if read_type == READ_BULK else GroupFastBulkRead)(self.port, self.ph)
+            for dxl_id in sorted(ranges):
+                group.addParam(dxl_id, ranges[dxl_id][0], ranges[dxl_id][1])
+
+        return group
+
+    def makePlan(self):
+        range_dict = dict((dxl_id, self.makeRanges(self.field_dict[dxl_id])) for dxl_id in self.field_dict)
+
+        # the n-th range of every id goes into the n-th round of reads. Ranges shared
+        # by more ids come first so that they line up in the same round.
+        counts = {}
+        for dxl_id in range_dict:
+            for address_range in range_dict[dxl_id]:
+                counts[address_range] = counts.get(address_range, 0) + 1
+
+        rounds = []
+        for dxl_id in sorted(range_dict):
+            ranges = sorted(range_dict[dxl_id], key=lambda address_range: (-counts[address_range], address_range))
+            for index, address_range in enumerate(ranges):
+                if index == len(rounds):
+                    rounds.append({})
+                rounds[index][dxl_id] = address_range
+
+        reads = []
+        time = 0.0
+        for ranges in rounds:
+            best_time = None
+            for candidate in self.getCandidates(ranges):
+                candidate_time = sum(self.getReadTime(read_type, read_ranges) for read_type, read_ranges in candidate)
+                if best_time is None or candidate_time < best_time:
+                    best, best_time = candidate, candidate_time
+
+            reads.extend(best)
+            time += best_time
+
+        return ReadPlan(reads, [self.makeGroup(read_type, ranges) for read_type, ranges in reads], time)
@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+from .robotis_def import *
+from .read_planner import *
+
+FIELD_NUM_ADDRESS = 0
+FIELD_NUM_LENGTH = 1
+FIELD_NUM_PERIOD = 2
+FIELD_NUM_PHASE = 3
+
+SCHEDULE_LOAD_CYCLES = 4096  # cycles over which the phases are balanced, at most
+
+
+# Reads named fields of a set of devices at different rates, one txRxPacket per
+# control cycle. A field read every n-th cycle gets a phase in 0 .. n-1 so that the
+# slow fields are spread over the cycles and every cycle reads about the same number
+# of bytes. The reads of each cycle are laid out by ReadPlanner.
+class ReadScheduler(object):
+    def __init__(self, port, ph, cycle_rate, use_fast_read=False):
+        self.port = port
+        self.ph = ph
+        self.cycle_rate = cycle_rate  # Hz, rate of txRxPacket calls
+        self.use_fast_read = use_fast_read
+
+        self.is_param_changed = False
+        self.field_list = []
+        self.field_dict = {}  # name: [address, length, period, phase]
+        self.id_list = []
+        self.value_dict = {}  # name: {id: [value, timestamp]}
+
+        self.is_scheduled = False
+        self.plan_dict = {}  # tuple of field names: ReadPlan, built on first use
+        self.cycle = 0
+
+    def addField(self, name, address, data_length, rate=None):
+        # rate in Hz; None (or the cycle rate and above) reads the field every cycle
+        if name in self.field_dict or data_length not in (1, 2, 4):
+            return False
+
+        if rate is None or rate >= self.cycle_rate:
+            period = 1
+        elif rate <= 0:
+            return False
+        else:
+            period = max(1, int(round(float(self.cycle_rate) / rate)))
+
+        self.field_list.append(name)
+        self.field_dict[name] = [address, data_length, period, 0]
+        self.value_dict[name] = {}
+
+        self.is_param_changed = True
+        return True
+
+    def removeField(self, name):
+        if name not in self.field_dict:  # NOT exist
+            return
+
+        self.field_list.remove(name)
+        del self.field_dict[name]
+        del self.value_dict[name]
+
+        self.is_param_changed = True
+
+    def addParam(self, dxl_id):
+        if dxl_id in self.id_list:  # dxl_id already exist
+            return False
+
+        self.id_list.append(dxl_id)
+
+        self.is_param_changed = True
+        return True
+
+    def removeParam(self, dxl_id):
+        if dxl_id not in self.id_list:  # NOT exist
+            return
+
+        self.id_list.remove(dxl_id)
+        for name in self.value_dict:
+            self.value_dict[name].pop(dxl_id, None)
+
+        self.is_param_changed = True
+
+    def clearParam(self):
+        del self.id_list[:]
+        for name in self.value_dict:
+            self.value_dict[name].clear()
+
+        self.is_param_changed = True
+
+    def getPeriod(self, name):
+        # the field is read every getPeriod() cycles
+        if name not in self.field_dict:
+            return 0
+
+        return self.field_dict[name][FIELD_NUM_PERIOD]
+
+    def getPhase(self, name):
+        if name not in self.field_dict:
+            return 0
+
+        return self.field_dict[name][FIELD_NUM_PHASE]
+
+    def makeSchedule(self):
+        self.plan_dict = {}
+        self.cycle = 0
+        self.is_param_changed = False
+        self.is_scheduled = bool(self.field_list and self.id_list)
+
+        if not self.is_scheduled:
+            return
+
+        # the phases are balanced over the hyperperiod (lcm of the periods), or over
+        # SCHEDULE_LOAD_CYCLES cycles (and at least the longest period) when that is longer
+        max_period = max(self.field_dict[name][FIELD_NUM_PERIOD] for name in self.field_list)
+        load_cycles = max(SCHEDULE_LOAD_CYCLES, max_period)
+        hyperperiod = 1
+        for name in self.field_list:
+            period = self.field_dict[name][FIELD_NUM_PERIOD]
+            a, b = hyperperiod, period
+            while b:
+                a, b = b, a % b
+            hyperperiod = min(hyperperiod * period // a, load_cycles)
+        load_cycles = min(hyperperiod, load_cycles)
+
+        # bytes per cycle; the biggest and least frequent fields are placed first,
+        # each in the phase whose busiest cycle is the least loaded
+        load = [0] * load_cycles
+        fields = sorted(self.field_list, key=lambda name: (-self.field_dict[name][FIELD_NUM_LENGTH],
+                                                           -self.field_dict[name][FIELD_NUM_PERIOD]))
+        for name in fields:
+            field = self.field_dict[name]
+            period = field[FIELD_NUM_PERIOD]
+            field[FIELD_NUM_PHASE] = min(range(0, period),
+                                         key=lambda phase: (max(load[phase::period]), phase))
+            for cycle in range(field[FIELD_NUM_PHASE], load_cycles, period):
+                load[cycle] += field[FIELD_NUM_LENGTH]
+
+    def getPlan(self, names):
+        # ReadPlan of a set of fields; cycles reading the same fields share it
+        plan = self.plan_dict.get(names)
+        if plan is None:
+            planner = ReadPlanner(self.port, self.ph, use_fast_read=self.use_fast_read)
+            for name in names:
+                for dxl_id in self.id_list:
+                    planner.addParam(dxl_id, self.field_dict[name][FIELD_NUM_ADDRESS],
+                                     self.field_dict[name][FIELD_NUM_LENGTH])
+            plan = self.plan_dict[names] = planner.makePlan()
+
+        return plan
+
+    def getCycleFields(self, cycle):
+        # names of the fields read in the given cycle
+        if self.is_param_changed is True:
+            self.makeSchedule()
+
+        if not self.is_scheduled:
+            return []
+
+        return [name for name in self.field_list
+                if cycle % self.field_dict[name][FIELD_NUM_PERIOD] == self.field_dict[name][FIELD_NUM_PHASE]]
+
+    def getCycleTime(self, cycle):
+        # estimated bus time of the given cycle, msec
+        if self.is_param_changed is True:
+            self.makeSchedule()
+
+        if not self.is_scheduled:
+            return 0.0
+
+        return self.getPlan(tuple(self.getCycleFields(cycle))).getTime()
+
+    def getCycle(self):
+        return self.cycle
+
+    def txRxPacket(self):
+        if self.is_param_changed is True:
+            self.makeSchedule()
+
+        if not self.is_scheduled:
+            return COMM_NOT_AVAILABLE
+
+        names = tuple(self.getCycleFields(self.cycle))
+        plan = self.getPlan(names)
+        self.cycle += 1
+
+        result = plan.txRxPacket()
+
+        rx_time = self.port.getCurrentTime()
+        for name in names:
+            address, data_length = self.field_dict[name][FIELD_NUM_ADDRESS: FIELD_NUM_LENGTH + 1]
+            values = self.value_dict[name]
+            for dxl_id in self.id_list:
+                if plan.isAvailable(dxl_id, address, data_length):
+                    values[dxl_id] = [plan.getData(dxl_id, address, data_length), rx_time]
+
+        return result
+
+    def isAvailable(self, dxl_id, name):
+        # True once the field of dxl_id has been read
+        return name in self.value_dict and dxl_id in self.value_dict[name]
+
+    def getData(self, dxl_id, name):
+        # latest value read; see getTimestamp() for its age
+        if not self.isAvailable(dxl_id, name):
+            return 0
+
+        return self.value_dict[name][dxl_id][0]
+
+    def getTimestamp(self, dxl_id, name):
+        # port time (msec) of the latest read of the field; 0.0 if never
+        if not self.isAvailable(dxl_id, name):
+            return 0.0
+
+        return self.value_dict[name][dxl_id][1]
@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import threading
+from bisect import bisect_right
+
+from .robotis_def import *
+from .group_sync_read import *
+from .group_sync_write import *
+from .group_fast_sync_read import *
+from .control_loop import *
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+INTERPOLATION_LINEAR = 0
+INTERPOLATION_CUBIC = 1  # cubic Hermite, finite difference tangents, at rest at both ends
+
+TRAJECTORY_NUM_TIMES = 0
+TRAJECTORY_NUM_POINTS = 1
+TRAJECTORY_NUM_TANGENTS = 2
+TRAJECTORY_NUM_INTERPOLATION = 3
+TRAJECTORY_NUM_START = 4
+
+
+# Plays joint trajectories given as waypoints with times (sec, from the start of
+# the trajectory) on a ControlLoop: every cycle the goals of all the joints are
+# interpolated at the cycle time and sync written through one kept packet, and the
+# present positions are sync read to measure the tracking error. Playback speed
+# follows the clock, not the bus.
+#
+# setTrajectory() can be called at any time, also from another thread. The new
+# trajectory starts at the next cycle; with blend_time the goals cross-fade from
+# the old trajectory to the new one over that time instead of jumping.
+class TrajectoryExecutor(object):
+    def __init__(self, port, ph, goal_address, present_address=None, data_length=4, rate=100,
+                 use_fast_read=False, history_size=STATS_HISTORY):
+        self.port = port
+        self.ph = ph
+
+        self.group_write = GroupSyncWrite(port, ph, goal_address, data_length)
+        self.group_read = None
+        if present_address is not None:
+            read_class = GroupFastSyncRead if use_fast_read else GroupSyncRead
+            self.group_read = read_class(port, ph, present_address, data_length)
+        self.loop = ControlLoop(rate, self.group_read, self.group_write, clock=port.clock, history_size=history_size)
+
+        # trajectory, previous and blend_time change together under lock
+        self.lock = threading.Lock()
+        self.trajectory = None  # [times, points, tangents, interpolation, start]
+        self.previous = None  # trajectory blended out
+        self.blend_time = 0
+        self.is_playing = False  # goals of the trajectory left to send
+
+        self.last_goal = None
+        self.tracking_error = None
+        self.max_tracking_error = None
+
+    def addParam(self, dxl_id):
+        # joints take the columns of the waypoints in the order they are added
+        if not self.group_write.addParam(dxl_id, [0] * self.group_write.data_length):
+            return False
+
+        if self.group_read is not None:
+            self.group_read.addParam(dxl_id)
+
+        with self.lock:
+            self.trajectory = self.previous = self.last_goal = None
+            self.is_playing = False
+        return True
+
+    def clearParam(self):
+        self.group_write.clearParam()
+        if self.group_read is not None:
+            self.group_read.clearParam()
+
+        with self.lock:
+            self.trajectory = self.previous = self.last_goal = None
+            self.is_playing = False
+
+    def makeArray(self, values):
+        if numpy is not None:
+            return numpy.array(values, dtype=numpy.float64)
+
+        return [float(value) for value in values]
+
+    def setTrajectory(self, times, positions, interpolation=INTERPOLATION_LINEAR, blend_time=0.0):
+        # times: increasing, sec; positions: one row (a value per joint) per time
+        times = [float(t) for t in times]
+        points = [self.makeArray(row) for row in positions]
+        joint_num = len(self.group_write.id_list)
+
+        if not times or len(times) != len(points) or any(len(row) != joint_num for row in points) or \
+                any(t1 <= t0 for t0, t1 in zip(times, times[1:])):
+            return False
+
+        # tangents of the cubic: zero at the ends, finite differences inside
+        tangents = [self.combine(points[0], 0.0)]
+        for index in range(1, len(points) - 1):
+            tangents.append(self.combine(points[index + 1], 1.0 / (times[index + 1] - times[index - 1]),
+                                         points[index - 1], -1.0 / (times[index + 1] - times[index - 1])))
+        if len(points) > 1:
+            tangents.append(self.combine(points[-1], 0.0))
+
+        trajectory = [times, points, tangents, interpolation, None]
+
+        with self.lock:
+            previous = self.trajectory
+            last_goal = self.last_goal
+            if previous is None and last_goal is not None:
+                previous = [[0.0], [self.makeArray(last_goal)], [self.combine(last_goal, 0.0)],
+                            INTERPOLATION_LINEAR, 0]
+
+            if blend_time > 0 and previous is not None:
+                self.previous = previous
+                self.blend_time = int(blend_time * 1000000000)
+            else:
+                self.previous = None
+                self.blend_time = 0
+
+            self.trajectory = trajectory
+            self.is_playing = True
+
+        return True
+
+    def combine(self, a, wa, b=None, wb=0.0, c=None, wc=0.0, d=None, wd=0.0):
+        # wa * a + wb * b + ... of joint vectors
+        if numpy is not None:
+            value = numpy.asarray(a, dtype=numpy.float64) * wa
+            for vector, weight in ((b, wb), (c, wc), (d, wd)):
+                if vector is not None:
+                    value = value + vector * weight
+            return value
+
+        vectors = [(vector, weight) for vector, weight in ((a, wa), (b, wb), (c, wc), (d, wd)) if vector is not None]
+        return [sum(vector[index] * weight for vector, weight in vectors) for index in range(0, len(a))]
+
+    def interpolate(self, trajectory, t):
+        # joint positions of the trajectory at t sec from its start
+        times, points, tangents, interpolation = trajectory[TRAJECTORY_NUM_TIMES: TRAJECTORY_NUM_START]
+        if t <= times[0]:
+            return points[0]
+        if t >= times[-1]:
+            return points[-1]
+
+        index = bisect_right(times, t) - 1
+        h = times[index + 1] - times[index]
+        s = (t - times[index]) / h
+
+        if interpolation == INTERPOLATION_LINEAR:
+            return self.combine(points[index], 1.0 - s, points[index + 1], s)
+
+        s2 = s * s
+        s3 = s2 * s
+        return self.combine(points[index], 2 * s3 - 3 * s2 + 1, tangents[index], (s3 - 2 * s2 + s) * h,
+                            points[index + 1], -2 * s3 + 3 * s2, tangents[index + 1], (s3 - s2) * h)
+
+    def getTime(self, trajectory, now):
+        # sec since the start of the trajectory; a new trajectory starts now
+        if trajectory[TRAJECTORY_NUM_START] is None:
+            trajectory[TRAJECTORY_NUM_START] = now
+        return (now - trajectory[TRAJECTORY_NUM_START]) / 1000000000.0
+
+    def isFinished(self):
+        with self.lock:
+            trajectory, previous = self.trajectory, self.previous
+        if trajectory is None:
+            return True
+        if trajectory[TRAJECTORY_NUM_START] is None:
+            return False
+
+        now = self.loop.clock()
+        return self.getTime(trajectory, now) >= trajectory[TRAJECTORY_NUM_TIMES][-1] and previous is None
+
+    def updateGoal(self, now=None):
+        # interpolates the goals at 'now' (clock nsec) into the write packet; returns
+        # False if there is nothing to send (no trajectory, goal out of range).
+        # is_playing turns False with the goal of the end of the trajectory
+        with self.lock:
+            trajectory, previous, blend_time = self.trajectory, self.previous, self.blend_time
+        if trajectory is None:
+            self.is_playing = False
+            return False
+
+        if now is None:
+            now = self.loop.clock()
+        t = self.getTime(trajectory, now)
+        goal = self.interpolate(trajectory, t)
+
+        if previous is not None:
+            elapsed = now - trajectory[TRAJECTORY_NUM_START]
+            if elapsed >= blend_time:
+                previous = None
+                with self.lock:
+                    # unless setTrajectory() has come in since
+                    if self.trajectory is trajectory:
+                        self.previous = None
+            else:
+                w = float(elapsed) / blend_time
+                w = w * w * (3 - 2 * w)  # smoothstep
+                goal = self.combine(self.interpolate(previous, self.getTime(previous, now)), 1.0 - w, goal, w)
+
+        if numpy is not None:
+            goal = numpy.rint(goal).astype(numpy.int64)
+        else:
+            goal = [int(round(value)) for value in goal]
+
+        if not self.group_write.setValues(goal, True):
+            self.is_playing = False
+            return False
+
+        self.last_goal = goal
+        with self.lock:
+            if self.trajectory is trajectory:
+                self.is_playing = t < trajectory[TRAJECTORY_NUM_TIMES][-1] or previous is not None
+        return True
+
+    def updateTrackingError(self):
+        # present position - goal sent in the cycle before
+        if self.group_read is None or self.last_goal is None:
+            return
+
+        present = self.group_read.getAll(self.group_read.start_address, self.group_read.data_length, True)
+        if present is None:
+            return
+
+        if numpy is not None:
+            error = present - self.last_goal
+            self.max_tracking_error = numpy.abs(error) if self.max_tracking_error is None else \
+                numpy.maximum(self.max_tracking_error, numpy.abs(error))
+        else:
+            error = [value - goal for value, goal in zip(present, self.last_goal)]
+            self.max_tracking_error = [abs(value) for value in error] if self.max_tracking_error is None else \
+                [max(last, abs(value)) for last, value in zip(self.max_tracking_error, error)]
+        self.tracking_error = error
+
+    def step(self):
+        # one cycle without the ControlLoop: read feedback, update and send the goals
+        if self.group_read is not None and self.group_read.txRxPacket() == COMM_SUCCESS:
+            self.updateTrackingError()
+
+        if not self.updateGoal():
+            # never send the packet without a goal: it still holds the placeholders of addParam
+            return COMM_NOT_AVAILABLE
+
+        return self.group_write.txPacket()
+
+    def runStep(self, loop):
+        if loop.getLastResult() == COMM_SUCCESS:
+            self.updateTrackingError()
+
+        if not self.is_playing:
+            # the end of the trajectory went out in the cycle before
+            return False
+
+        return self.updateGoal()
+
+    def run(self):
+        # plays the trajectory (and the ones set while it runs) to its end or stop()
+        if self.trajectory is None:
+            return 0
+
+        self.tracking_error = self.max_tracking_error = None
+        return self.loop.run(self.runStep)
+
+    def stop(self):
+        self.loop.stop()
+
+    def getTrackingError(self):
+        # per joint, of the last cycle; None without feedback
+        return self.tracking_error
+
+    def getMaxTrackingError(self):
+        # per joint, largest absolute error since run()
+        return self.max_tracking_error
+
+    def resetStats(self):
+        self.loop.resetStats()
+
+    def getStats(self):
+        # ControlLoop statistics of the cycles run so far
+        return self.loop.getStats()
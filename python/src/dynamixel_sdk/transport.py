@@ -0,0 +1,381 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import os
+import sys
+import time
+import errno
+import select
+import socket
+import threading
+import serial
+
+LATENCY_TIMER_PATH = '/sys/bus/usb-serial/devices/%s/latency_timer'
+
+# monotonic clock in integer nanoseconds; immune to NTP steps and slews.
+# Python 2 has neither perf_counter nor monotonic, so the wall clock is the last resort there.
+try:
+    default_clock = time.perf_counter_ns
+except AttributeError:
+    _clock_sec = getattr(time, 'perf_counter', None) or getattr(time, 'monotonic', None) or time.time
+
+    def default_clock():
+        return int(_clock_sec() * 1000000000)
+
+
+# Byte stream under a PortHandler. read() never blocks; waitForData() is where a
+# transport sleeps until bytes arrive.
+class Transport(object):
+    def open(self, baudrate):
+        raise NotImplementedError()
+
+    def close(self):
+        pass
+
+    def read(self, length):
+        raise NotImplementedError()
+
+    def write(self, data):
+        raise NotImplementedError()
+
+    def flush(self):
+        pass
+
+    def resetInput(self):
+        while self.inWaiting() > 0:
+            self.read(self.inWaiting())
+
+    def inWaiting(self):
+        raise NotImplementedError()
+
+    def waitForData(self, msec):
+        deadline = default_clock() + int(msec * 1000000)
+        while self.inWaiting() == 0:
+            if default_clock() >= deadline:
+                return False
+            time.sleep(0.0005)
+
+        return True
+
+    def getLatencyTimer(self):
+        # -1: unknown, PortHandler falls back to LATENCY_TIMER
+        return -1
+
+    def setLatencyTimer(self, msec):
+        return False
+
+    def setLowLatency(self, enable):
+        return False
+
+
+class SerialTransport(Transport):
+    def __init__(self, port_name):
+        self.port_name = port_name
+        self.ser = None
+
+    def open(self, baudrate):
+        self.close()
+
+        self.ser = serial.Serial(
+            port=self.port_name,
+            baudrate=baudrate,
+            # parity = serial.PARITY_ODD,
+            # stopbits = serial.STOPBITS_TWO,
+            bytesize=serial.EIGHTBITS,
+            timeout=0
+        )
+
+        self.ser.reset_input_buffer()
+
+        return True
+
+    def close(self):
+        if self.ser is not None:
+            self.ser.close()
+
+    def read(self, length):
+        return self.ser.read(length)
+
+    def write(self, data):
+        return self.ser.write(data)
+
+    def flush(self):
+        self.ser.flush()
+
+    def resetInput(self):
+        self.ser.reset_input_buffer()
+
+    def inWaiting(self):
+        return self.ser.in_waiting
+
+    def waitForData(self, msec):
+        if self.ser.in_waiting > 0:
+            return True
+
+        # no select() on windows serial handles
+        if os.name == 'nt':
+            return Transport.waitForData(self, msec)
+
+        readable, _, _ = select.select([self.ser.fileno()], [], [], msec / 1000.0)
+        return len(readable) > 0
+
+    def getLatencyTimerPath(self):
+        if not sys.platform.startswith('linux'):
+            return None
+
+        # resolve /dev/serial/by-id/... links down to the ttyUSB* name
+        path = LATENCY_TIMER_PATH % os.path.basename(os.path.realpath(self.port_name))
+        if not os.path.exists(path):
+            return None
+
+        return path
+
+    def getLatencyTimer(self):
+        path = self.getLatencyTimerPath()
+        if path is None:
+            return -1
+
+        try:
+            with open(path, 'r') as f:
+                return int(f.read().strip())
+        except (IOError, OSError, ValueError):
+            return -1
+
+    def setLatencyTimer(self, msec):
+        path = self.getLatencyTimerPath()
+        if path is None:
+            return False
+
+        try:
+            with open(path, 'w') as f:
+                f.write('%d' % msec)
+        except (IOError, OSError):
+            return False
+
+        return True
+
+    def setLowLatency(self, enable):
+        # ASYNC_LOW_LATENCY through TIOCSSERIAL (linux only)
+        if not hasattr(self.ser, 'set_low_latency_mode'):
+            return False
+
+        try:
+            self.ser.set_low_latency_mode(enable)
+        except (IOError, OSError, ValueError, NotImplementedError):
+            return False
+
+        return True
+
+
+# Raw TCP serial bridge (ser2net "raw" mode and similar). The bridge owns the line
+# settings, so the baudrate only feeds the timeout calculation.
+class TcpTransport(Transport):
+    def __init__(self, host, port, connect_timeout=3.0):
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.sock = None
+
+    def open(self, baudrate):
+        if self.sock is not None:
+            return True
+
+        self.sock = socket.create_connection((self.host, self.port), self.connect_timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.settimeout(None)
+
+        return True
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def read(self, length):
+        readable, _, _ = select.select([self.sock], [], [], 0)
+        if not readable:
+            return b''
+
+        try:
+            data = self.sock.recv(length)
+        except socket.error as e:
+            if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                return b''
+            raise
+
+        if not data:
+            # readable but empty: the bridge closed the connection. Returning b'' here
+            # would make every rx loop spin on select until its timeout.
+            raise socket.error(errno.ECONNRESET, 'connection closed by %s:%d' % (self.host, self.port))
+
+        return data
+
+    def write(self, data):
+        if isinstance(data, list):
+            data = bytearray(data)
+
+        self.sock.sendall(data)
+        return len(data)
+
+    def inWaiting(self):
+        readable, _, _ = select.select([self.sock], [], [], 0)
+        return 1 if readable else 0
+
+    def waitForData(self, msec):
+        readable, _, _ = select.select([self.sock], [], [], msec / 1000.0)
+        return len(readable) > 0
+
+
+# Master side of a pseudo terminal pair; any serial program (or a device emulator)
+# can open getSlaveName() as if it were the bus.
+class PtyTransport(Transport):
+    def __init__(self):
+        self.master_fd = -1
+        self.slave_fd = -1
+        self.slave_name = None
+
+    def open(self, baudrate):
+        if self.master_fd >= 0:
+            return True
+
+        import pty
+        import tty
+        import fcntl
+
+        self.master_fd, self.slave_fd = pty.openpty()
+        tty.setraw(self.slave_fd)
+        flags = fcntl.fcntl(self.master_fd, fcntl.F_GETFL)
+        fcntl.fcntl(self.master_fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+        self.slave_name = os.ttyname(self.slave_fd)
+
+        return True
+
+    def close(self):
+        if self.master_fd >= 0:
+            os.close(self.master_fd)
+            os.close(self.slave_fd)
+        self.master_fd = -1
+        self.slave_fd = -1
+        self.slave_name = None
+
+    def getSlaveName(self):
+        return self.slave_name
+
+    def read(self, length):
+        try:
+            return os.read(self.master_fd, length)
+        except OSError as e:
+            if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EIO):
+                return b''
+            raise
+
+    def write(self, data):
+        if isinstance(data, list):
+            data = bytearray(data)
+
+        try:
+            return os.write(self.master_fd, data)
+        except OSError as e:
+            if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                return 0
+            raise
+
+    def inWaiting(self):
+        import fcntl
+        import struct
+        import termios
+
+        buf = fcntl.ioctl(self.master_fd, termios.FIONREAD, struct.pack('I', 0))
+        return struct.unpack('I', buf)[0]
+
+    def waitForData(self, msec):
+        readable, _, _ = select.select([self.master_fd], [], [], msec / 1000.0)
+        return len(readable) > 0
+
+
+# In-memory byte pipe. An unpaired transport echoes what it writes, a pair made
+# by createLoopbackPair() behaves like the two ends of a cable.
+class LoopbackTransport(Transport):
+    def __init__(self):
+        self.buffer = bytearray()
+        self.cond = threading.Condition()
+        self.peer = self
+
+    def open(self, baudrate):
+        return True
+
+    def read(self, length):
+        with self.cond:
+            data = bytes(self.buffer[:length])
+            del self.buffer[:length]
+
+        return data
+
+    def write(self, data):
+        peer = self.peer
+        with peer.cond:
+            peer.buffer.extend(data)
+            peer.cond.notify_all()
+
+        return len(data)
+
+    def resetInput(self):
+        with self.cond:
+            del self.buffer[:]
+
+    def inWaiting(self):
+        return len(self.buffer)
+
+    def waitForData(self, msec):
+        deadline = default_clock() + int(msec * 1000000)
+        with self.cond:
+            while not self.buffer:
+                remaining = deadline - default_clock()
+                if remaining <= 0:
+                    return False
+                self.cond.wait(remaining / 1000000000.0)
+
+        return True
+
+    def getLatencyTimer(self):
+        return 0
+
+
+def createLoopbackPair():
+    end0 = LoopbackTransport()
+    end1 = LoopbackTransport()
+    end0.peer = end1
+    end1.peer = end0
+    return end0, end1
+
+
+def createTransport(port_name):
+    # "tcp://host:port" / "socket://host:port", "pty://", "loop://"; anything else is a serial device
+    if port_name.startswith('tcp://') or port_name.startswith('socket://'):
+        scheme, address = port_name.split('://', 1)
+        host, _, port = address.rpartition(':')
+        if not host or not port.isdigit() or not 0 < int(port) < 65536:
+            raise ValueError('%s: expected %s://host:port' % (port_name, scheme))
+        return TcpTransport(host, int(port))
+    elif port_name.startswith('pty://'):
+        return PtyTransport()
+    elif port_name.startswith('loop://'):
+        return LoopbackTransport()
+    else:
+        return SerialTransport(port_name)
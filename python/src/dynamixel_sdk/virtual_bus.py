@@ -0,0 +1,449 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import time
+import random
+import threading
+
+from .robotis_def import *
+from .transport import *
+from .crc16 import *
+from .protocol2_packet_handler import *
+
+VIRTUAL_CONTROL_TABLE_SIZE = 1024
+
+# Control table layout used by the examples (JA / DYNAMIXEL P style)
+VIRTUAL_ADDR_MODEL_NUMBER = 0
+VIRTUAL_ADDR_FIRMWARE_VERSION = 6
+VIRTUAL_ADDR_ID = 7
+VIRTUAL_ADDR_TORQUE_ENABLE = 512
+VIRTUAL_ADDR_GOAL_POSITION = 564
+VIRTUAL_ADDR_PRESENT_POSITION = 580
+VIRTUAL_ADDR_INDIRECT_ADDRESS = 168
+VIRTUAL_ADDR_INDIRECT_DATA = 634
+VIRTUAL_INDIRECT_NUM = 128
+
+
+class VirtualDevice(object):
+    def __init__(self, dxl_id, model_number=0, firmware_version=0, return_delay_time=0.0,
+                 control_table_size=VIRTUAL_CONTROL_TABLE_SIZE):
+        self.id = dxl_id
+        self.model_number = model_number
+        self.firmware_version = firmware_version
+        self.return_delay_time = return_delay_time  # msec
+        self.control_table = bytearray(control_table_size)
+        self.reg_write = None
+        self.read_error = 0  # when set, reads are answered with this error and no data
+
+        self.control_table[VIRTUAL_ADDR_MODEL_NUMBER] = DXL_LOBYTE(model_number)
+        self.control_table[VIRTUAL_ADDR_MODEL_NUMBER + 1] = DXL_HIBYTE(model_number)
+        self.control_table[VIRTUAL_ADDR_FIRMWARE_VERSION] = firmware_version
+        self.control_table[VIRTUAL_ADDR_ID] = dxl_id
+
+    def isValidRange(self, address, length):
+        return address >= 0 and length >= 0 and address + length <= len(self.control_table)
+
+    def getIndirectAddress(self, address):
+        # control table address behind an Indirect Data byte, or address itself
+        index = address - VIRTUAL_ADDR_INDIRECT_DATA
+        if index < 0 or index >= VIRTUAL_INDIRECT_NUM:
+            return address
+
+        return DXL_MAKEWORD(self.control_table[VIRTUAL_ADDR_INDIRECT_ADDRESS + 2 * index],
+                            self.control_table[VIRTUAL_ADDR_INDIRECT_ADDRESS + 2 * index + 1])
+
+    def isIndirectRange(self, address, length):
+        return address < VIRTUAL_ADDR_INDIRECT_DATA + VIRTUAL_INDIRECT_NUM and VIRTUAL_ADDR_INDIRECT_DATA < address + length
+
+    def read(self, address, length):
+        if self.isIndirectRange(address, length):
+            return bytearray(self.control_table[self.getIndirectAddress(address + i) % len(self.control_table)]
+                             for i in range(0, length))
+
+        return self.control_table[address: address + length]
+
+    def write(self, address, data):
+        if self.isIndirectRange(address, len(data)):
+            for i in range(0, len(data)):
+                target = self.getIndirectAddress(address + i) % len(self.control_table)
+                if self.isIndirectRange(target, 1):  # no indirection of indirect data
+                    self.control_table[target] = data[i]
+                else:
+                    self.write(target, data[i: i + 1])
+            return
+
+        self.control_table[address: address + len(data)] = data
+
+        # with torque on, the joint "moves" straight to its goal position
+        if address <= VIRTUAL_ADDR_GOAL_POSITION + 3 and VIRTUAL_ADDR_GOAL_POSITION < address + len(data) \
+                and self.control_table[VIRTUAL_ADDR_TORQUE_ENABLE]:
+            self.control_table[VIRTUAL_ADDR_PRESENT_POSITION: VIRTUAL_ADDR_PRESENT_POSITION + 4] = \
+                self.control_table[VIRTUAL_ADDR_GOAL_POSITION: VIRTUAL_ADDR_GOAL_POSITION + 4]
+
+    def getValue(self, address, length):
+        value = 0
+        for i in range(length - 1, -1, -1):
+            value = (value << 8) | self.control_table[address + i]
+        return value
+
+    def setValue(self, address, length, value):
+        for i in range(0, length):
+            self.control_table[address + i] = (value >> (8 * i)) & 0xFF
+
+
+# Protocol 2.0 bus of emulated devices behind the Transport interface. Status
+# packets become readable only once they would have crossed the wire at the
+# configured baudrate (wire_time=True), or immediately for full speed runs.
+class VirtualBus(Transport):
+    def __init__(self, devices=(), wire_time=True, byte_error_rate=0.0, seed=None, clock=None):
+        self.ph = Protocol2PacketHandler()
+        self.devices = {}
+        self.wire_time = wire_time
+        self.byte_error_rate = byte_error_rate
+        self.random = random.Random(seed)
+        self.clock = default_clock if clock is None else clock
+        self.lock = threading.Lock()
+
+        self.baudrate = 1000000
+        self.byte_time = 0
+        self.bus_free_time = 0
+        self.tx_done_time = 0
+        self.instruction = bytearray()
+        self.segments = []  # [arrival time of first byte, bytearray], in wire order
+
+        self.instruction_packets = 0
+        self.status_packets = 0
+        self.tx_bytes = 0
+        self.rx_bytes = 0
+        self.corrupted_bytes = 0
+
+        for device in devices:
+            self.addDevice(device)
+
+    def addDevice(self, device):
+        self.devices[device.id] = device
+
+    def removeDevice(self, dxl_id):
+        self.devices.pop(dxl_id, None)
+
+    def getDevice(self, dxl_id):
+        return self.devices.get(dxl_id)
+
+    def resetStats(self):
+        self.instruction_packets = 0
+        self.status_packets = 0
+        self.tx_bytes = 0
+        self.rx_bytes = 0
+        self.corrupted_bytes = 0
+
+    def open(self, baudrate):
+        self.baudrate = baudrate
+        # 10 bits per byte on the wire (start + 8 data + stop)
+        self.byte_time = int(10 * 1000000000 / baudrate) if self.wire_time else 0
+        return True
+
+    def close(self):
+        with self.lock:
+            del self.instruction[:]
+            del self.segments[:]
+
+    def getLatencyTimer(self):
+        return 0
+
+    def flush(self):
+        # like tcdrain(): wait until everything written so far has left the host
+        with self.lock:
+            drain_time = self.tx_done_time - self.clock()
+        if drain_time > 0:
+            time.sleep(drain_time / 1000000000.0)
+
+    def availableLength(self, now):
+        length = 0
+        for start, data in self.segments:
+            if now < start:
+                break
+            if self.byte_time == 0:
+                length += len(data)
+                continue
+            arrived = min(len(data), (now - start) // self.byte_time)
+            length += arrived
+            if arrived < len(data):
+                break
+        return length
+
+    def inWaiting(self):
+        with self.lock:
+            return self.availableLength(self.clock())
+
+    def read(self, length):
+        with self.lock:
+            length = min(length, self.availableLength(self.clock()))
+            data = bytearray()
+            while len(data) < length:
+                start, segment = self.segments[0]
+                take = min(len(segment), length - len(data))
+                data += segment[:take]
+                if take == len(segment):
+                    del self.segments[0]
+                else:
+                    del segment[:take]
+                    self.segments[0][0] = start + take * self.byte_time
+
+        self.rx_bytes += len(data)
+        return bytes(data)
+
+    def waitForData(self, msec):
+        deadline = self.clock() + int(msec * 1000000)
+        while True:
+            with self.lock:
+                now = self.clock()
+                if self.availableLength(now) > 0:
+                    return True
+                next_arrival = self.segments[0][0] + self.byte_time if self.segments else deadline
+            if now >= deadline:
+                return False
+            time.sleep((min(next_arrival, deadline) - now) / 1000000000.0)
+
+    def write(self, data):
+        with self.lock:
+            now = self.clock()
+            self.instruction.extend(data)
+            self.tx_bytes += len(data)
+
+            # the instruction occupies the wire before anyone can answer
+            self.bus_free_time = max(self.bus_free_time, now) + len(data) * self.byte_time
+            self.tx_done_time = self.bus_free_time
+
+            while True:
+                packet = self.takeInstruction()
+                if packet is None:
+                    break
+                self.instruction_packets += 1
+                self.execute(packet)
+
+        return len(data)
+
+    def takeInstruction(self):
+        buf = self.instruction
+        idx = buf.find(b'\xff\xff\xfd')
+        if idx < 0:
+            del buf[:max(0, len(buf) - 2)]
+            return None
+        del buf[:idx]
+
+        if len(buf) < PKT_INSTRUCTION + 1:
+            return None
+
+        total_length = DXL_MAKEWORD(buf[PKT_LENGTH_L], buf[PKT_LENGTH_H]) + PKT_LENGTH_H + 1
+        if len(buf) < total_length:
+            return None
+
+        packet = list(buf[:total_length])
+        del buf[:total_length]
+
+        crc = DXL_MAKEWORD(packet[total_length - 2], packet[total_length - 1])
+        if updateCRC(0, packet, total_length - 2) != crc:
+            # devices ignore corrupted instructions
+            return self.takeInstruction()
+
+        return self.ph.removeStuffing(packet)
+
+    def execute(self, packet):
+        dxl_id = packet[PKT_ID]
+        inst = packet[PKT_INSTRUCTION]
+        param_length = DXL_MAKEWORD(packet[PKT_LENGTH_L], packet[PKT_LENGTH_H]) - 3
+        param = packet[PKT_PARAMETER0: PKT_PARAMETER0 + param_length]
+
+        if inst == INST_SYNC_READ:
+            address = DXL_MAKEWORD(param[0], param[1])
+            length = DXL_MAKEWORD(param[2], param[3])
+            for target_id in param[4:]:
+                device = self.devices.get(target_id)
+                if device is not None:
+                    self.respondRead(device, address, length)
+            return
+
+        if inst == INST_FAST_SYNC_READ:
+            address = DXL_MAKEWORD(param[0], param[1])
+            length = DXL_MAKEWORD(param[2], param[3])
+            self.respondFastRead([(target_id, address, length) for target_id in param[4:]])
+            return
+
+        if inst == INST_FAST_BULK_READ:
+            self.respondFastRead([(param[i], DXL_MAKEWORD(param[i + 1], param[i + 2]), DXL_MAKEWORD(param[i + 3], param[i + 4]))
+                                  for i in range(0, len(param), 5)])
+            return
+
+        if inst == INST_SYNC_WRITE:
+            address = DXL_MAKEWORD(param[0], param[1])
+            length = DXL_MAKEWORD(param[2], param[3])
+            for i in range(4, len(param), length + 1):
+                device = self.devices.get(param[i])
+                if device is not None and device.isValidRange(address, length):
+                    device.write(address, bytearray(param[i + 1: i + 1 + length]))
+            return
+
+        if inst == INST_BULK_READ:
+            for i in range(0, len(param), 5):
+                device = self.devices.get(param[i])
+                if device is not None:
+                    self.respondRead(device, DXL_MAKEWORD(param[i + 1], param[i + 2]),
+                                     DXL_MAKEWORD(param[i + 3], param[i + 4]))
+            return
+
+        if inst == INST_BULK_WRITE:
+            i = 0
+            while i + 5 <= len(param):
+                address = DXL_MAKEWORD(param[i + 1], param[i + 2])
+                length = DXL_MAKEWORD(param[i + 3], param[i + 4])
+                device = self.devices.get(param[i])
+                if device is not None and device.isValidRange(address, length):
+                    device.write(address, bytearray(param[i + 5: i + 5 + length]))
+                i += 5 + length
+            return
+
+        if dxl_id == BROADCAST_ID:
+            targets = [self.devices[target_id] for target_id in sorted(self.devices)]
+        elif dxl_id in self.devices:
+            targets = [self.devices[dxl_id]]
+        else:
+            return
+
+        for device in targets:
+            error, data = self.executeDevice(device, inst, param)
+            # broadcast instructions are only answered by ping
+            if dxl_id != BROADCAST_ID or inst == INST_PING:
+                self.respond(device, error, data)
+
+    def executeDevice(self, device, inst, param):
+        if inst == INST_PING:
+            return 0, [DXL_LOBYTE(device.model_number), DXL_HIBYTE(device.model_number), device.firmware_version]
+
+        if inst == INST_READ:
+            address = DXL_MAKEWORD(param[0], param[1])
+            length = DXL_MAKEWORD(param[2], param[3])
+            if not device.isValidRange(address, length):
+                return ERRNUM_ACCESS, []
+            if device.read_error:
+                return device.read_error, []
+            return 0, device.read(address, length)
+
+        if inst == INST_WRITE or inst == INST_REG_WRITE:
+            address = DXL_MAKEWORD(param[0], param[1])
+            data = bytearray(param[2:])
+            if not device.isValidRange(address, len(data)):
+                return ERRNUM_ACCESS, []
+            if inst == INST_WRITE:
+                device.write(address, data)
+            else:
+                device.reg_write = (address, data)
+            return 0, []
+
+        if inst == INST_ACTION:
+            if device.reg_write is not None:
+                device.write(*device.reg_write)
+                device.reg_write = None
+            return 0, []
+
+        if inst in (INST_REBOOT, INST_FACTORY_RESET, INST_CLEAR):
+            return 0, []
+
+        return ERRNUM_INSTRUCTION, []
+
+    def respondRead(self, device, address, length):
+        if not device.isValidRange(address, length):
+            self.respond(device, ERRNUM_ACCESS, [0] * length)
+        elif device.read_error:
+            self.respond(device, device.read_error, [])
+        else:
+            self.respond(device, 0, device.read(address, length))
+
+    def respondFastRead(self, reads):
+        # one status packet from BROADCAST_ID carrying ERROR ID DATA CRC16 per device;
+        # each device CRC covers the packet up to its data, the last one is the packet CRC
+        packet = [0] * (PKT_PARAMETER0)
+        packet[PKT_ID] = BROADCAST_ID
+        packet[PKT_INSTRUCTION] = INST_STATUS
+        packet[PKT_HEADER0: PKT_RESERVED + 1] = [0xFF, 0xFF, 0xFD, 0x00]
+
+        first_device = None
+        for dxl_id, address, length in reads:
+            device = self.devices.get(dxl_id)
+            if device is None:
+                continue
+            if first_device is None:
+                first_device = device
+            else:
+                crc = updateCRC(0, packet, len(packet))
+                packet.extend([DXL_LOBYTE(crc), DXL_HIBYTE(crc)])
+
+            if device.read_error:
+                packet.extend([device.read_error, device.id])
+            elif device.isValidRange(address, length):
+                packet.extend([0, device.id])
+                packet.extend(device.read(address, length))
+            else:
+                packet.extend([ERRNUM_ACCESS, device.id])
+                packet.extend([0] * length)
+
+        if first_device is None:
+            return
+
+        packet.extend([0, 0])  # packet CRC
+        packet[PKT_LENGTH_L] = DXL_LOBYTE(len(packet) - PKT_INSTRUCTION)
+        packet[PKT_LENGTH_H] = DXL_HIBYTE(len(packet) - PKT_INSTRUCTION)
+
+        self.queueStatus(first_device, packet)
+
+    def respond(self, device, error, data):
+        packet = [0] * (len(data) + 11)
+        packet[PKT_ID] = device.id
+        packet[PKT_LENGTH_L] = DXL_LOBYTE(len(data) + 4)
+        packet[PKT_LENGTH_H] = DXL_HIBYTE(len(data) + 4)
+        packet[PKT_INSTRUCTION] = INST_STATUS
+        packet[PKT_ERROR] = error
+        packet[PKT_PARAMETER0 + 1: PKT_PARAMETER0 + 1 + len(data)] = data
+
+        self.queueStatus(device, packet)
+
+    def queueStatus(self, device, packet):
+        packet = self.ph.addStuffing(packet)
+        total_length = DXL_MAKEWORD(packet[PKT_LENGTH_L], packet[PKT_LENGTH_H]) + PKT_LENGTH_H + 1
+
+        packet[PKT_HEADER0] = 0xFF
+        packet[PKT_HEADER1] = 0xFF
+        packet[PKT_HEADER2] = 0xFD
+        packet[PKT_RESERVED] = 0x00
+        crc = updateCRC(0, packet, total_length - 2)
+        packet[total_length - 2] = DXL_LOBYTE(crc)
+        packet[total_length - 1] = DXL_HIBYTE(crc)
+
+        data = bytearray(packet[:total_length])
+        if self.byte_error_rate > 0.0:
+            for i in range(0, len(data)):
+                if self.random.random() < self.byte_error_rate:
+                    data[i] ^= 1 << self.random.randint(0, 7)
+                    self.corrupted_bytes += 1
+
+        start = self.bus_free_time
+        if self.wire_time:
+            start += int(device.return_delay_time * 1000000)
+        self.segments.append([start, data])
+        self.bus_free_time = start + len(data) * self.byte_time
+        self.status_packets += 1
@@ -64,6 +64,7 @@ DEVICENAME                  = '/dev/ttyUSB0'
 TORQUE_ENABLE               = 1                 # Value for enabling the torque
 TORQUE_DISABLE              = 0                 # Value for disabling the torque
 DXL_MOVING_STATUS_THRESHOLD = 20                # Dynamixel moving status threshold
+MOVING_TIMEOUT              = 10                # sec, longest wait for the joints to reach a goal position
 
 index = 0
 dxl_goal_position = [DXL_MINIMUM_POSITION_VALUE, DXL_MAXIMUM_POSITION_VALUE]         # Goal position
@@ -180,21 +181,19 @@ for i in range(0, len(DXL_ID)):
     elif dxl_error != 0:
         print("%s" % packetHandler.getRxPacketError(dxl_error))
 
-    while 1:
-        # Read present position
-        dxl_present_position, dxl_comm_result, dxl_error = packetHandler.read4ByteTxRx(portHandler, DXL_ID[i], ADDR_PRESENT_POSITION)
-        dxl_present_position = struct.unpack('i', struct.pack('I', dxl_present_position))[0];
-        
-        if dxl_comm_result != COMM_SUCCESS:
-            print("%s" % packetHandler.getTxRxResult(dxl_comm_result))
-        elif dxl_error != 0:
-            print("%s" % packetHandler.getRxPacketError(dxl_error))
+# Wait until all the joints are home, one syncread per cycle
+dxl_present_position, dxl_timeout_id, dxl_comm_result = waitUntilReached(portHandler, packetHandler, DXL_ID, 0,
+                                                                         DXL_MOVING_STATUS_THRESHOLD, MOVING_TIMEOUT,
+                                                                         ADDR_PRESENT_POSITION, LEN_PRESENT_POSITION)
+if dxl_comm_result != COMM_SUCCESS:
+    print("%s" % packetHandler.getTxRxResult(dxl_comm_result))
 
-        print("[ID:%03d] GoalPos:%03d  PresPos:%03d" % (DXL_ID[i], 0, dxl_present_position))
+for i in range(0, len(DXL_ID)):
+    print("[ID:%03d] GoalPos:%03d  PresPos:%03d" % (DXL_ID[i], 0, dxl_present_position[i]))
+    if DXL_ID[i] in dxl_timeout_id:
+        print("[ID:%03d] goal position not reached in time" % DXL_ID[i])
 
-        if not abs(0 - dxl_present_position) > DXL_MOVING_STATUS_THRESHOLD:
-            break    
-        
+for i in range(0, len(DXL_ID)):
     # Disable Dynamixel Torque
     dxl_comm_result, dxl_error = packetHandler.write1ByteTxRx(portHandler, DXL_ID[i], ADDR_TORQUE_ENABLE, TORQUE_DISABLE)
     if dxl_comm_result != COMM_SUCCESS:
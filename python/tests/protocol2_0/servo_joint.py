@@ -47,6 +47,8 @@ ADDR_PRESENT_POSITION       = 580
 LEN_PRESENT_POSITION        = 4          # Data Byte Length
 BAUDRATE                    = 2000000
 ADDR_DRIVE_MODE             = 10
+CONTROL_RATE                = 100               # Hz, goal position updates per second
+TRAJECTORY_STEP             = 0.01              # sec between the points of dxl_goal_position
 
 # DYNAMIXEL Protocol Version (1.0 / 2.0)
 # https://emanual.robotis.com/docs/en/dxl/protocol2/
@@ -66,6 +68,7 @@ DEVICENAME                  = '/dev/ttyUSB0'
 TORQUE_ENABLE               = 1                 # Value for enabling the torque
 TORQUE_DISABLE              = 0                 # Value for disabling the torque
 DXL_MOVING_STATUS_THRESHOLD = 20                # Dynamixel moving status threshold
+MOVING_TIMEOUT              = 10                # sec, longest wait for the joints to reach a goal position
 PROFILE_ENABLE              = 0x0;              # Value for enable trajectory profile
 PROFILE_DISABLE             = 0x02;             # Value for disable trajectory profile
 
@@ -82,11 +85,9 @@ portHandler = PortHandler(DEVICENAME)
 # Get methods and members of Protocol1PacketHandler or Protocol2PacketHandler
 packetHandler = PacketHandler(PROTOCOL_VERSION)
 
-# Initialize GroupSyncWrite instance
-groupSyncWrite = GroupSyncWrite(portHandler, packetHandler, ADDR_GOAL_POSITION, LEN_GOAL_POSITION)
-
-# Initialize GroupSyncRead instace for Present Position
-groupSyncRead = GroupSyncRead(portHandler, packetHandler, ADDR_PRESENT_POSITION, LEN_PRESENT_POSITION)
+# Initialize TrajectoryExecutor instance streaming the goal positions, with present position feedback
+trajectoryExecutor = TrajectoryExecutor(portHandler, packetHandler, ADDR_GOAL_POSITION, ADDR_PRESENT_POSITION,
+                                        LEN_GOAL_POSITION, rate=CONTROL_RATE)
 
 # Open port
 if portHandler.openPort():
@@ -132,21 +133,19 @@ for i in range(0, len(DXL_ID)):
     elif dxl_error != 0:
         print("%s" % packetHandler.getRxPacketError(dxl_error))
 
-    while 1:
-        # Read present position
-        dxl_present_position, dxl_comm_result, dxl_error = packetHandler.read4ByteTxRx(portHandler, DXL_ID[i], ADDR_PRESENT_POSITION)
-        dxl_present_position = struct.unpack('i', struct.pack('I', dxl_present_position))[0];
-        
-        if dxl_comm_result != COMM_SUCCESS:
-            print("%s" % packetHandler.getTxRxResult(dxl_comm_result))
-        elif dxl_error != 0:
-            print("%s" % packetHandler.getRxPacketError(dxl_error))
-
-        print("[ID:%03d] GoalPos:%03d  PresPos:%03d" % (DXL_ID[i], dxl_goal_position[0], dxl_present_position))
+# Wait until all the joints are at the start position point, one syncread per cycle
+dxl_present_position, dxl_timeout_id, dxl_comm_result = waitUntilReached(portHandler, packetHandler, DXL_ID, dxl_goal_position[0],
+                                                                         DXL_MOVING_STATUS_THRESHOLD, MOVING_TIMEOUT,
+                                                                         ADDR_PRESENT_POSITION, LEN_PRESENT_POSITION)
+if dxl_comm_result != COMM_SUCCESS:
+    print("%s" % packetHandler.getTxRxResult(dxl_comm_result))
 
-        if not abs(dxl_goal_position[0] - dxl_present_position) > DXL_MOVING_STATUS_THRESHOLD:
-            break    
+for i in range(0, len(DXL_ID)):
+    print("[ID:%03d] GoalPos:%03d  PresPos:%03d" % (DXL_ID[i], dxl_goal_position[0], dxl_present_position[i]))
+    if DXL_ID[i] in dxl_timeout_id:
+        print("[ID:%03d] goal position not reached in time" % DXL_ID[i])
 
+for i in range(0, len(DXL_ID)):
     # Disable Dynamixel Torque
     dxl_comm_result, dxl_error = packetHandler.write1ByteTxRx(portHandler, DXL_ID[i], ADDR_TORQUE_ENABLE, TORQUE_DISABLE)
     if dxl_comm_result != COMM_SUCCESS:
@@ -168,10 +167,10 @@ for i in range(0, len(DXL_ID)):
     elif dxl_error != 0:
         print("%s" % packetHandler.getRxPacketError(dxl_error))       
             
-    # Add parameter storage for Dynamixel present position value
-    dxl_addparam_result = groupSyncRead.addParam(DXL_ID[i])
+    # Add the joint to the trajectory executor (goal position write, present position read)
+    dxl_addparam_result = trajectoryExecutor.addParam(DXL_ID[i])
     if dxl_addparam_result != True:
-        print("[ID:%03d] groupSyncRead addparam failed" % DXL_ID[i])
+        print("[ID:%03d] trajectoryExecutor addparam failed" % DXL_ID[i])
         quit()
 
 while 1:
@@ -179,30 +178,23 @@ while 1:
     if getch() == chr(0x1b):
         break
 
-    for index in range(0, len(dxl_goal_position)):
-        # Allocate goal position value into byte array
-        param_goal_position = [DXL_LOBYTE(DXL_LOWORD(dxl_goal_position[index])), DXL_HIBYTE(DXL_LOWORD(dxl_goal_position[index])), DXL_LOBYTE(DXL_HIWORD(dxl_goal_position[index])), DXL_HIBYTE(DXL_HIWORD(dxl_goal_position[index]))]
-
+    # Play the goal position points on the control clock, TRAJECTORY_STEP apart
+    trajectoryExecutor.setTrajectory([index * TRAJECTORY_STEP for index in range(0, len(dxl_goal_position))],
+                                     [[goal_position] * len(DXL_ID) for goal_position in dxl_goal_position],
+                                     INTERPOLATION_CUBIC)
+    trajectoryExecutor.resetStats()
+    trajectoryExecutor.run()
+
+    controlStats = trajectoryExecutor.getStats()
+    print("cycles:%d  overruns:%d  jitter p99:%.3f ms" % (controlStats['cycle_count'], controlStats['overrun_count'],
+                                                       controlStats['jitter']['p99']))
+    dxl_tracking_error = trajectoryExecutor.getMaxTrackingError()
+    if dxl_tracking_error is not None:
         for i in range(0, len(DXL_ID)):
-            # Add Dynamixel goal position value to the Syncwrite parameter storage
-            dxl_addparam_result = groupSyncWrite.addParam(DXL_ID[i], param_goal_position)
-            if dxl_addparam_result != True:
-                print("[ID:%03d] groupSyncWrite addparam failed" % DXL_ID[i])
-                quit()
-
-        # Syncwrite goal position
-        dxl_comm_result = groupSyncWrite.txPacket()
-        if dxl_comm_result != COMM_SUCCESS:
-            print("%s" % packetHandler.getTxRxResult(dxl_comm_result))
+            print("[ID:%03d] max tracking error:%d" % (DXL_ID[i], dxl_tracking_error[i]))
 
-        # Clear syncwrite parameter storage
-        groupSyncWrite.clearParam()
-
-        # Wait for movement to goal position
-        time.sleep(0.01)
-
-# Clear syncread parameter storage
-groupSyncRead.clearParam()
+# Clear trajectory executor parameter storage
+trajectoryExecutor.clearParam()
 
 for i in range(0, len(DXL_ID)):
     # Enable trajectory profile
@@ -220,21 +212,19 @@ for i in range(0, len(DXL_ID)):
     elif dxl_error != 0:
         print("%s" % packetHandler.getRxPacketError(dxl_error))
 
-    while 1:
-        # Read present position
-        dxl_present_position, dxl_comm_result, dxl_error = packetHandler.read4ByteTxRx(portHandler, DXL_ID[i], ADDR_PRESENT_POSITION)
-        dxl_present_position = struct.unpack('i', struct.pack('I', dxl_present_position))[0];
-        
-        if dxl_comm_result != COMM_SUCCESS:
-            print("%s" % packetHandler.getTxRxResult(dxl_comm_result))
-        elif dxl_error != 0:
-            print("%s" % packetHandler.getRxPacketError(dxl_error))
+# Wait until all the joints are home, one syncread per cycle
+dxl_present_position, dxl_timeout_id, dxl_comm_result = waitUntilReached(portHandler, packetHandler, DXL_ID, 0,
+                                                                         DXL_MOVING_STATUS_THRESHOLD, MOVING_TIMEOUT,
+                                                                         ADDR_PRESENT_POSITION, LEN_PRESENT_POSITION)
+if dxl_comm_result != COMM_SUCCESS:
+    print("%s" % packetHandler.getTxRxResult(dxl_comm_result))
 
-        print("[ID:%03d] GoalPos:%03d  PresPos:%03d" % (DXL_ID[i], 0, dxl_present_position))
+for i in range(0, len(DXL_ID)):
+    print("[ID:%03d] GoalPos:%03d  PresPos:%03d" % (DXL_ID[i], 0, dxl_present_position[i]))
+    if DXL_ID[i] in dxl_timeout_id:
+        print("[ID:%03d] goal position not reached in time" % DXL_ID[i])
 
-        if not abs(0 - dxl_present_position) > DXL_MOVING_STATUS_THRESHOLD:
-            break    
-        
+for i in range(0, len(DXL_ID)):
     # Disable Dynamixel Torque
     dxl_comm_result, dxl_error = packetHandler.write1ByteTxRx(portHandler, DXL_ID[i], ADDR_TORQUE_ENABLE, TORQUE_DISABLE)
     if dxl_comm_result != COMM_SUCCESS:
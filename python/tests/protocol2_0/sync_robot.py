@@ -66,9 +66,12 @@ DEVICENAME                  = '/dev/ttyUSB0'
 TORQUE_ENABLE               = 1                 # Value for enabling the torque
 TORQUE_DISABLE              = 0                 # Value for disabling the torque
 DXL_MOVING_STATUS_THRESHOLD = 20                # Dynamixel moving status threshold
+MOVING_TIMEOUT              = 10                # sec, longest wait for the joints to reach a goal position
 PROFILE_ENABLE              = 0x0;              # Value for enable trajectory profile
 PROFILE_DISABLE             = 0x02;             # Value for disable trajectory profile
 CURRENT_CONTROL_MODE        = 0;                # Value for current control mode
+CONTROL_RATE                = 100               # Hz, mirroring cycles per second
+MAX_POSITION_JUMP           = 10000             # Master position steps larger than this are ignored
 
 dxl_goal_position = [0, 0, 0, 0, 0, 0];         # Goal position
 dxl_present_position = [0, 0, 0, 0, 0, 0];         # Present position
@@ -83,11 +86,9 @@ portHandler = PortHandler(DEVICENAME)
 # Get methods and members of Protocol1PacketHandler or Protocol2PacketHandler
 packetHandler = PacketHandler(PROTOCOL_VERSION)
 
-# Initialize GroupSyncWrite instance
-groupSyncWrite = GroupSyncWrite(portHandler, packetHandler, ADDR_GOAL_POSITION, LEN_GOAL_POSITION)
-
-# Initialize GroupSyncRead instace for Present Position
-groupSyncRead = GroupSyncRead(portHandler, packetHandler, ADDR_PRESENT_POSITION, LEN_PRESENT_POSITION)
+# Initialize LeaderFollower instance: Master Robot present position -> Slave Robot goal position
+leaderFollower = LeaderFollower(portHandler, packetHandler, ADDR_PRESENT_POSITION, ADDR_GOAL_POSITION, LEN_GOAL_POSITION,
+                                rate=CONTROL_RATE, pipelined=True, max_jump=MAX_POSITION_JUMP)
 
 # Open port
 if portHandler.openPort():
@@ -134,21 +135,19 @@ for i in range(0, len(Slave_ID)):
     elif dxl_error != 0:
         print("%s" % packetHandler.getRxPacketError(dxl_error))
 
-    while 1:
-        # Read present position
-        dxl_present_position[i], dxl_comm_result, dxl_error = packetHandler.read4ByteTxRx(portHandler, Slave_ID[i], ADDR_PRESENT_POSITION)
-        dxl_present_position[i] = struct.unpack('i', struct.pack('I', dxl_present_position[i]))[0];
-        
-        if dxl_comm_result != COMM_SUCCESS:
-            print("%s" % packetHandler.getTxRxResult(dxl_comm_result))
-        elif dxl_error != 0:
-            print("%s" % packetHandler.getRxPacketError(dxl_error))
-
-        print("[ID:%03d] GoalPos:%03d  PresPos:%03d" % (Slave_ID[i], dxl_goal_position[i], dxl_present_position[i]))
+# Wait until all the Slave Robot joints are within the threshold, one syncread per cycle
+dxl_present_position, dxl_timeout_id, dxl_comm_result = waitUntilReached(portHandler, packetHandler, Slave_ID, dxl_goal_position[:len(Slave_ID)],
+                                                                         DXL_MOVING_STATUS_THRESHOLD, MOVING_TIMEOUT,
+                                                                         ADDR_PRESENT_POSITION, LEN_PRESENT_POSITION)
+if dxl_comm_result != COMM_SUCCESS:
+    print("%s" % packetHandler.getTxRxResult(dxl_comm_result))
 
-        if not abs(dxl_goal_position[i] - dxl_present_position[i]) > DXL_MOVING_STATUS_THRESHOLD:
-            break  
+for i in range(0, len(Slave_ID)):
+    print("[ID:%03d] GoalPos:%03d  PresPos:%03d" % (Slave_ID[i], dxl_goal_position[i], dxl_present_position[i]))
+    if Slave_ID[i] in dxl_timeout_id:
+        print("[ID:%03d] goal position not reached in time" % Slave_ID[i])
 
+for i in range(0, len(Slave_ID)):
     # Disable Dynamixel Torque
     dxl_comm_result, dxl_error = packetHandler.write1ByteTxRx(portHandler, Slave_ID[i], ADDR_TORQUE_ENABLE, TORQUE_DISABLE)
     if dxl_comm_result != COMM_SUCCESS:
@@ -201,21 +200,19 @@ for i in range(0, len(Master_ID)):
     elif dxl_error != 0:
         print("%s" % packetHandler.getRxPacketError(dxl_error))
 
-    while 1:
-        # Read present position
-        dxl_present_position[i], dxl_comm_result, dxl_error = packetHandler.read4ByteTxRx(portHandler, Master_ID[i], ADDR_PRESENT_POSITION)
-        dxl_present_position[i] = struct.unpack('i', struct.pack('I', dxl_present_position[i]))[0];
-        
-        if dxl_comm_result != COMM_SUCCESS:
-            print("%s" % packetHandler.getTxRxResult(dxl_comm_result))
-        elif dxl_error != 0:
-            print("%s" % packetHandler.getRxPacketError(dxl_error))
-
-        # print("[ID:%03d] GoalPos:%03d  PresPos:%03d" % (Master_ID[i], dxl_goal_position[i], dxl_present_position[i]))
+# Wait until all the Master Robot joints are within the threshold, one syncread per cycle
+dxl_present_position, dxl_timeout_id, dxl_comm_result = waitUntilReached(portHandler, packetHandler, Master_ID, dxl_goal_position[:len(Master_ID)],
+                                                                         DXL_MOVING_STATUS_THRESHOLD, MOVING_TIMEOUT,
+                                                                         ADDR_PRESENT_POSITION, LEN_PRESENT_POSITION)
+if dxl_comm_result != COMM_SUCCESS:
+    print("%s" % packetHandler.getTxRxResult(dxl_comm_result))
 
-        if not abs(dxl_goal_position[i] - dxl_present_position[i]) > DXL_MOVING_STATUS_THRESHOLD:
-            break    
+for i in range(0, len(Master_ID)):
+    # print("[ID:%03d] GoalPos:%03d  PresPos:%03d" % (Master_ID[i], dxl_goal_position[i], dxl_present_position[i]))
+    if Master_ID[i] in dxl_timeout_id:
+        print("[ID:%03d] goal position not reached in time" % Master_ID[i])
 
+for i in range(0, len(Master_ID)):
     # Configure master motor operating mode to current control
     dxl_comm_result, dxl_error = packetHandler.write1ByteTxRx(portHandler, Master_ID[i], ADDR_OPERATING_MODE, CURRENT_CONTROL_MODE)
     if dxl_comm_result != COMM_SUCCESS:
@@ -223,49 +220,24 @@ for i in range(0, len(Master_ID)):
     elif dxl_error != 0:
         print("%s" % packetHandler.getRxPacketError(dxl_error))     
 
-# Add parameter storage for Master Robot present position value
+# Mirror each Master Robot joint onto its Slave Robot joint
 for i in range(0, len(Master_ID)):
-    dxl_addparam_result = groupSyncRead.addParam(Master_ID[i])
-    if dxl_addparam_result != True:
-        print("[ID:%03d] groupSyncRead addparam failed" % Master_ID[i])
+    dxl_addjoint_result = leaderFollower.addJoint(Master_ID[i], Slave_ID[i])
+    if dxl_addjoint_result != True:
+        print("[ID:%03d] leaderFollower addjoint failed" % Slave_ID[i])
         quit()
 
 while 1:
-    # Syncread present position
-    dxl_comm_result = groupSyncRead.txRxPacket()
+    # Syncread master present position, syncwrite slave goal position with the next syncread
+    leaderFollower.resetStats()
+    leaderFollower.run(CONTROL_RATE)
 
-    if dxl_comm_result != COMM_SUCCESS:
-        print("%s" % packetHandler.getTxRxResult(dxl_comm_result))
-        # while 1:
-        #     None
-    elif dxl_error != 0:
-        print("%s" % packetHandler.getRxPacketError(dxl_error))
-    else:
-        for i in range(0, len(Master_ID)):
-            dxl_present_position[i] = groupSyncRead.getData(Master_ID[i], ADDR_PRESENT_POSITION, LEN_PRESENT_POSITION)
-            dxl_present_position[i] = struct.unpack('i', struct.pack('I', dxl_present_position[i]))[0]
-            if abs(dxl_present_position[i] - dxl_goal_position[i]) < 10000:
-                dxl_goal_position[i] = dxl_present_position[i]
-            print("dxl_goal_position[%03d]:%03d " % (Master_ID[i],dxl_goal_position[i]))
-
-            param_goal_position = [DXL_LOBYTE(DXL_LOWORD(dxl_goal_position[i])), DXL_HIBYTE(DXL_LOWORD(dxl_goal_position[i])), DXL_LOBYTE(DXL_HIWORD(dxl_goal_position[i])), DXL_HIBYTE(DXL_HIWORD(dxl_goal_position[i]))]
-        
-            # Add Salve Robot goal position value to the Syncwrite parameter storage
-            dxl_addparam_result = groupSyncWrite.addParam(Slave_ID[i], param_goal_position)
-            if dxl_addparam_result != True:
-                print("[ID:%03d] groupSyncWrite addparam failed" % Slave_ID[i])
-                quit()
-
-        # Syncwrite goal position
-        dxl_comm_result = groupSyncWrite.txPacket()
-        if dxl_comm_result != COMM_SUCCESS:
-            print("%s" % packetHandler.getTxRxResult(dxl_comm_result))
-
-        # Clear syncwrite parameter storage
-        groupSyncWrite.clearParam()
-
-    # Wait for movement to goal position
-    time.sleep(0.01)
+    for i in range(0, len(Slave_ID)):
+        print("dxl_goal_position[%03d]:%03d " % (Slave_ID[i], leaderFollower.getFollowerGoal(Slave_ID[i])))
+
+    controlStats = leaderFollower.getStats()
+    print("latency mean:%.3f p99:%.3f ms  overruns:%d" % (controlStats['latency']['mean'],
+                                                       controlStats['latency']['p99'], controlStats['overrun_count']))
 
 # Close port
 portHandler.closePort()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+#*******************************************************************************
+#*******************     Virtual Bus Benchmark Example      ********************
+#  Required Environment to run this example :
+#    - Nothing but the SDK: the bus and the DYNAMIXELs are emulated
+#  How to use the example :
+#    - Set NUM_DEVICES, BAUDRATE and NUM_CYCLES below and run it.
+#    - WIRE_TIME = False measures the pure protocol stack without wire delays.
+#*******************************************************************************
+
+import time
+
+from dynamixel_sdk import *                    # Uses Dynamixel SDK library
+
+# Control table address
+ADDR_TORQUE_ENABLE          = 512
+ADDR_GOAL_POSITION          = 564
+LEN_GOAL_POSITION           = 4
+ADDR_PRESENT_POSITION       = 580
+LEN_PRESENT_POSITION        = 4
+BAUDRATE                    = 2000000
+
+PROTOCOL_VERSION            = 2.0
+
+NUM_DEVICES                 = 6
+RETURN_DELAY_TIME           = 0.02              # msec
+WIRE_TIME                   = True
+BYTE_ERROR_RATE             = 0.0
+NUM_CYCLES                  = 1000
+
+DXL_ID = list(range(1, NUM_DEVICES + 1))
+
+virtualBus = VirtualBus([VirtualDevice(dxl_id, return_delay_time=RETURN_DELAY_TIME) for dxl_id in DXL_ID],
+                        wire_time=WIRE_TIME, byte_error_rate=BYTE_ERROR_RATE, seed=0)
+
+# Initialize PortHandler instance on top of the virtual bus
+portHandler = PortHandler('virtual', transport=virtualBus)
+
+# Initialize PacketHandler instance
+packetHandler = PacketHandler(PROTOCOL_VERSION)
+
+# Initialize GroupSyncWrite / GroupSyncRead instances
+groupSyncWrite = GroupSyncWrite(portHandler, packetHandler, ADDR_GOAL_POSITION, LEN_GOAL_POSITION)
+groupSyncRead = GroupSyncRead(portHandler, packetHandler, ADDR_PRESENT_POSITION, LEN_PRESENT_POSITION)
+groupFastSyncRead = GroupFastSyncRead(portHandler, packetHandler, ADDR_PRESENT_POSITION, LEN_PRESENT_POSITION)
+
+portHandler.openPort()
+portHandler.setBaudRate(BAUDRATE)
+
+for dxl_id in DXL_ID:
+    packetHandler.write1ByteTxRx(portHandler, dxl_id, ADDR_TORQUE_ENABLE, 1)
+    groupSyncRead.addParam(dxl_id)
+    groupFastSyncRead.addParam(dxl_id)
+    groupSyncWrite.addParam(dxl_id, [0, 0, 0, 0])
+
+
+def run(name, cycle):
+    virtualBus.resetStats()
+    failures = 0
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for index in range(0, NUM_CYCLES):
+        if cycle(index) != COMM_SUCCESS:
+            failures += 1
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    packets = virtualBus.instruction_packets + virtualBus.status_packets
+    print("%-28s %8.1f cycles/s %9.1f packets/s %7.1f us cpu/cycle  failures:%d" %
+          (name, NUM_CYCLES / wall, packets / wall, cpu / NUM_CYCLES * 1000000.0, failures))
+
+
+def syncRead(index):
+    return groupSyncRead.txRxPacket()
+
+
+def fastSyncRead(index):
+    return groupFastSyncRead.txRxPacket()
+
+
+def syncWrite(index):
+    groupSyncWrite.setValues([index] * NUM_DEVICES)
+    return groupSyncWrite.txPacket()
+
+
+def readWrite(index):
+    result = syncRead(index)
+    if result != COMM_SUCCESS:
+        return result
+    return syncWrite(index)
+
+
+def exchange(index):
+    groupSyncWrite.setValues([index] * NUM_DEVICES)
+    return groupSyncRead.txRxPacketWithSyncWrite(groupSyncWrite)
+
+
+print("%d devices, %d bps, wire time %s" % (NUM_DEVICES, BAUDRATE, WIRE_TIME))
+run("GroupSyncRead", syncRead)
+run("GroupFastSyncRead", fastSyncRead)
+run("GroupSyncWrite", syncWrite)
+run("SyncRead + SyncWrite", readWrite)
+run("SyncWrite/SyncRead exchange", exchange)
+
+# Fixed rate loop: read, compute, write on absolute deadlines
+for rate in [250, 500, 1000]:
+    controlLoop = ControlLoop(rate, groupSyncRead, groupSyncWrite)
+    controlLoop.run(lambda loop: groupSyncWrite.setValues([loop.getCycle()] * NUM_DEVICES), NUM_CYCLES)
+    stats = controlLoop.getStats()
+    print("ControlLoop %4d Hz           jitter p50 %.3f p99 %.3f max %.3f ms  cycle p99 %.3f ms  overruns:%d" %
+          (rate, stats['jitter']['p50'], stats['jitter']['p99'], stats['jitter']['max'], stats['cycle_time']['p99'],
+           stats['overrun_count']))
+
+# Close port
+portHandler.closePort()
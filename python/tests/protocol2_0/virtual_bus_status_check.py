@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+#*******************************************************************************
+#*****************     Virtual Bus Status Check Example      *******************
+#  Required Environment to run this example :
+#    - Nothing but the SDK: the bus and the DYNAMIXELs are emulated
+#  How to use the example :
+#    - Run it. One device at a time answers reads with an error status that
+#      carries no data; the reads must flag that device and keep the values of
+#      the others right (or drop them), never hand out shifted data.
+#*******************************************************************************
+
+import sys
+
+from dynamixel_sdk import *                    # Uses Dynamixel SDK library
+
+# Control table address
+ADDR_PRESENT_POSITION       = 580
+LEN_PRESENT_POSITION        = 4
+BAUDRATE                    = 2000000
+
+PROTOCOL_VERSION            = 2.0
+
+READ_ERROR                  = 0x80              # Hardware alert, status without data
+
+DXL_ID = [1, 2, 3]
+DXL_PRESENT_POSITION = {1: 1000, 2: -2000, 3: 3000}
+
+virtualDevices = [VirtualDevice(dxl_id) for dxl_id in DXL_ID]
+virtualBus = VirtualBus(virtualDevices, wire_time=True)
+for virtualDevice in virtualDevices:
+    virtualDevice.setValue(ADDR_PRESENT_POSITION, LEN_PRESENT_POSITION, DXL_PRESENT_POSITION[virtualDevice.id] & 0xFFFFFFFF)
+
+# Initialize PortHandler instance on top of the virtual bus
+portHandler = PortHandler('virtual', transport=virtualBus)
+
+# Initialize PacketHandler instance
+packetHandler = PacketHandler(PROTOCOL_VERSION)
+
+portHandler.openPort()
+portHandler.setBaudRate(BAUDRATE)
+
+groupSyncRead = GroupSyncRead(portHandler, packetHandler, ADDR_PRESENT_POSITION, LEN_PRESENT_POSITION)
+groupFastSyncRead = GroupFastSyncRead(portHandler, packetHandler, ADDR_PRESENT_POSITION, LEN_PRESENT_POSITION)
+groupBulkRead = GroupBulkRead(portHandler, packetHandler)
+for dxl_id in DXL_ID:
+    groupSyncRead.addParam(dxl_id)
+    groupFastSyncRead.addParam(dxl_id)
+    groupBulkRead.addParam(dxl_id, ADDR_PRESENT_POSITION, LEN_PRESENT_POSITION)
+
+failures = 0
+for name, group in (('GroupSyncRead', groupSyncRead), ('GroupFastSyncRead', groupFastSyncRead),
+                    ('GroupBulkRead', groupBulkRead)):
+    for error_id in DXL_ID:
+        for virtualDevice in virtualDevices:
+            virtualDevice.read_error = READ_ERROR if virtualDevice.id == error_id else 0
+
+        # a good read first, so every slot holds data
+        virtualDevices[error_id - 1].read_error = 0
+        group.txRxPacket()
+        virtualDevices[error_id - 1].read_error = READ_ERROR
+
+        dxl_comm_result = group.txRxPacket()
+
+        problems = []
+        if dxl_comm_result == COMM_SUCCESS:
+            problems.append("read reported success")
+        if group.isAvailable(error_id, ADDR_PRESENT_POSITION, LEN_PRESENT_POSITION):
+            problems.append("ID:%03d available" % error_id)
+        if hasattr(group, 'getAll'):
+            group.getAll(ADDR_PRESENT_POSITION, LEN_PRESENT_POSITION)
+        for dxl_id in DXL_ID:
+            if not group.isAvailable(dxl_id, ADDR_PRESENT_POSITION, LEN_PRESENT_POSITION):
+                continue
+            dxl_present_position = group.getData(dxl_id, ADDR_PRESENT_POSITION, LEN_PRESENT_POSITION)
+            if dxl_present_position != DXL_PRESENT_POSITION[dxl_id] & 0xFFFFFFFF:
+                problems.append("ID:%03d PresPos:%d" % (dxl_id, dxl_present_position))
+
+        if problems:
+            failures += 1
+        print("%-18s error on ID:%03d  %-24s %s" % (name, error_id, packetHandler.getTxRxResult(dxl_comm_result),
+                                                      ", ".join(problems) if problems else "ok"))
+
+portHandler.closePort()
+
+sys.exit(1 if failures else 0)
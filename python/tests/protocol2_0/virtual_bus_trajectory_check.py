@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+################################################################################
+# Copyright 2017 ROBOTIS CO., LTD.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+#*******************************************************************************
+#***************     Virtual Bus Trajectory Check Example      *****************
+#  Required Environment to run this example :
+#    - Nothing but the SDK: the bus and the DYNAMIXELs are emulated
+#  How to use the example :
+#    - Run it. A TrajectoryExecutor without a trajectory must leave the goal
+#      positions alone; with one, it must end on the last point.
+#*******************************************************************************
+
+import sys
+
+from dynamixel_sdk import *                    # Uses Dynamixel SDK library
+
+# Control table address
+ADDR_TORQUE_ENABLE          = 512
+ADDR_GOAL_POSITION          = 564
+LEN_GOAL_POSITION           = 4
+ADDR_PRESENT_POSITION       = 580
+BAUDRATE                    = 2000000
+
+PROTOCOL_VERSION            = 2.0
+
+CONTROL_RATE                = 200               # Hz
+HOLD_POSITION               = 1500              # Goal position held before the executor runs
+
+DXL_ID = [1, 2]
+
+virtualBus = VirtualBus([VirtualDevice(dxl_id) for dxl_id in DXL_ID], wire_time=True)
+
+# Initialize PortHandler instance on top of the virtual bus
+portHandler = PortHandler('virtual', transport=virtualBus)
+
+# Initialize PacketHandler instance
+packetHandler = PacketHandler(PROTOCOL_VERSION)
+
+portHandler.openPort()
+portHandler.setBaudRate(BAUDRATE)
+
+trajectoryExecutor = TrajectoryExecutor(portHandler, packetHandler, ADDR_GOAL_POSITION, ADDR_PRESENT_POSITION,
+                                        LEN_GOAL_POSITION, rate=CONTROL_RATE)
+for dxl_id in DXL_ID:
+    packetHandler.write1ByteTxRx(portHandler, dxl_id, ADDR_TORQUE_ENABLE, 1)
+    packetHandler.write4ByteTxRx(portHandler, dxl_id, ADDR_GOAL_POSITION, HOLD_POSITION)
+    trajectoryExecutor.addParam(dxl_id)
+
+
+def readGoalPosition():
+    return [packetHandler.read4ByteTxRx(portHandler, dxl_id, ADDR_GOAL_POSITION)[0] for dxl_id in DXL_ID]
+
+
+failures = 0
+
+
+def check(name, value, expected):
+    global failures
+    if value != expected:
+        failures += 1
+    print("%-28s %-16s %s" % (name, value, "ok" if value == expected else "expected %s" % (expected,)))
+
+
+check("run() without trajectory", trajectoryExecutor.run(), 0)
+check("  goal positions", readGoalPosition(), [HOLD_POSITION] * len(DXL_ID))
+check("step() without trajectory", trajectoryExecutor.step(), COMM_NOT_AVAILABLE)
+check("  goal positions", readGoalPosition(), [HOLD_POSITION] * len(DXL_ID))
+
+trajectoryExecutor.setTrajectory([0.0, 0.1], [[HOLD_POSITION] * len(DXL_ID), [2000, -2000]], INTERPOLATION_CUBIC)
+trajectoryExecutor.run()
+check("run() to the end", readGoalPosition(), [2000, -2000 & 0xFFFFFFFF])
+check("  finished", trajectoryExecutor.isFinished(), True)
+
+portHandler.closePort()
+
+sys.exit(1 if failures else 0)